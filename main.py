@@ -1,7 +1,10 @@
 import argparse
+from dotenv import load_dotenv
 from src.cli import ZerePyCLI
 
 if __name__ == "__main__":
+    # Load .env once at startup; action modules read their settings from the environment
+    load_dotenv()
     parser = argparse.ArgumentParser(description='ZerePy - AI Agent Framework')
     parser.add_argument('--server', action='store_true', help='Run in server mode')
     parser.add_argument('--host', default='0.0.0.0', help='Server host (default: 0.0.0.0)')
@@ -1,18 +1,53 @@
+import importlib
 import logging
+import pkgutil
+import threading
+from typing import Callable, Dict
 
 logger = logging.getLogger("action_handler")
 
-action_registry = {}
+action_registry: Dict[str, Callable] = {}
+
+ACTIONS_PACKAGE = "src.actions"
+
+# Action modules are imported on the first lookup of an action that is not registered yet
+_modules_loaded = False
+_modules_lock = threading.Lock()
 
 def register_action(action_name):
     def decorator(func):
+        existing = action_registry.get(action_name)
+        # Re-registering the same function (e.g. on module reload) is fine, a second handler is not
+        if existing is not None and \
+                (existing.__module__, existing.__qualname__) != (func.__module__, func.__qualname__):
+            raise ValueError(
+                f"Action {action_name} already registered by {existing.__module__}.{existing.__qualname__}")
         action_registry[action_name] = func
         return func
     return decorator
 
+def _load_action_modules():
+    """Import every module under src.actions once so their @register_action decorators run"""
+    global _modules_loaded
+    with _modules_lock:
+        if _modules_loaded:
+            return
+        package = importlib.import_module(ACTIONS_PACKAGE)
+        for module in pkgutil.iter_modules(package.__path__):
+            try:
+                importlib.import_module(f"{ACTIONS_PACKAGE}.{module.name}")
+            except Exception as e:
+                # A module that fails to import (e.g. missing optional dependency) must not break the others;
+                # its actions just stay unregistered
+                logger.warning(f"Skipping action module {module.name}: {e}")
+        _modules_loaded = True
+
 def execute_action(agent, action_name, **kwargs):
-    if action_name in action_registry:
-       return action_registry[action_name](agent, **kwargs)
-    else:
+    action = action_registry.get(action_name)
+    if action is None:
+        _load_action_modules()
+        action = action_registry.get(action_name)
+    if action is None:
         logger.error(f"Action {action_name} not found")
         return None
+    return action(agent, **kwargs)
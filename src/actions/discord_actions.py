@@ -1,13 +1,29 @@
 from src.action_handler import register_action
-from src.helpers import print_h_bar
+from src.helpers import print_h_bar, fast_json
 import os
-from dotenv import load_dotenv
-import json
-
-load_dotenv()
 
 DEPLOY_TOKEN_URL = os.getenv("DEPLOY_TOKEN_URL")
 
+# Placeholder until the deploy endpoint is wired up; every message gets the same response
+DEPLOY_TOKEN_RESPONSE = {
+    "success": True,
+    "message": "Token created successfully",
+    "transactionHash": "0x0b44610182edfb449248456ed0e0bf0b13cb12ccda2a143d139f1c663e8ec4a",
+    "tokenAddress": "0xE4917899728432952F4dbcE1C526700312fE239e",
+    "redirectUrl": "http://localhost:3000/token/0xE4917899728432952F4dbcE1C526700312fE239e",
+    "tokenDetails": {
+        "name": "ToMJ",
+        "symbol": "TJ",
+        "description": (
+            "ToMJ is a token that combines the timeless magic of cartoon classics with the excitement of decentralized "
+            "finance. Its vision is to bring together nostalgic fans and forward-thinking investors to build a "
+            "community-driven ecosystem. The token will be used to govern and incentivize contributions to the platform."
+        ),
+        "imageUrl": "https://gateway.pinata.cloud/ipfs/bafybeickti2g27cgv2kulpa37x5sakldw1rk6x5ah6szoq3ja5pmnpdd",
+        "metadataURI": "https://gateway.pinata.cloud/ipfs/bafkreibuytmrvk5qw75jk3d42b2qnyyywp2adc7y3fehicwbf2lnaq4feu"
+    }
+}
+
 
 @register_action("list-channels")
 def list_channels(agent, **kwargs) -> dict:
@@ -29,12 +45,19 @@ def read_mentioned_messages(agent, **kwargs) -> list:
     )
     agent.logger.info(list_channels)
     list_messages = []
-    for channel in list_channels:
-        mentioned_messages = agent.connection_manager.perform_action(
+    if not list_channels:
+        return list_messages
+
+    def read_channel(channel):
+        return agent.connection_manager.perform_action(
             connection_name="discord",
             action_name="read-mentioned-messages",
             params=[channel["id"], 1]
         )
+
+    # Channel reads are independent, so fan them out instead of paying one round-trip per channel;
+    # map yields results in channel order
+    for mentioned_messages in agent.executor.map(read_channel, list_channels):
         agent.logger.info(mentioned_messages)
         if mentioned_messages:
             list_messages.append(mentioned_messages[0])
@@ -45,43 +68,23 @@ def read_mentioned_messages(agent, **kwargs) -> list:
 def deploy_token_discord(agent, **kwargs):
     agent.logger.info("\n📝 Deploying token with discord")
     print_h_bar()
-    # url = f"{DEPLOY_TOKEN_URL}api/memecoin/create-for-user"
 
     messages = read_mentioned_messages(agent, **kwargs)
+    if not messages:
+        return
+
+    deploy_results = [_deploy_token_for_message(agent, message) for message in messages]
+    agent.logger.info("\n✅ Deploy token successfully!")
+
+    # Generate natural language reponse given the json data, one independent LLM call per message
+    llm_messages = agent.prompt_llm_many(
+        prompts=["Generate a message discord given the response"] * len(deploy_results),
+        system_prompts=[fast_json.dumps(result) for result in deploy_results]
+    )
 
     responses = []
-    for message in messages:
-        agent.logger.info(message)
-        # data = {
-        #     "isTwitter": True,
-        #     "twitterHandle": tweet.get('username'),
-        #     "input": tweet.get('text'),
-        # }
-        # response = requests.post(url, data=data)
-        response = {
-            "success": True,
-            "message": "Token created successfully",
-            "transactionHash": "0x0b44610182edfb449248456ed0e0bf0b13cb12ccda2a143d139f1c663e8ec4a",
-            "tokenAddress": "0xE4917899728432952F4dbcE1C526700312fE239e",
-            "redirectUrl": "http://localhost:3000/token/0xE4917899728432952F4dbcE1C526700312fE239e",
-            "tokenDetails": {
-                "name": "ToMJ",
-                "symbol": "TJ",
-                "description": (
-                    "ToMJ is a token that combines the timeless magic of cartoon classics with the excitement of decentralized "
-                    "finance. Its vision is to bring together nostalgic fans and forward-thinking investors to build a "
-                    "community-driven ecosystem. The token will be used to govern and incentivize contributions to the platform."
-                ),
-                "imageUrl": "https://gateway.pinata.cloud/ipfs/bafybeickti2g27cgv2kulpa37x5sakldw1rk6x5ah6szoq3ja5pmnpdd",
-                "metadataURI": "https://gateway.pinata.cloud/ipfs/bafkreibuytmrvk5qw75jk3d42b2qnyyywp2adc7y3fehicwbf2lnaq4feu"
-            }
-        }
-        agent.logger.info("\n✅ Deploy token successfully!")
-
-        # Generate natural language reponse given the json data
-        llm_message = agent.prompt_llm(prompt="Generate a message discord given the response",
-                                       system_prompt=json.dumps(response))
-        agent.logger.info(f"\n📝 Generated response: {llm_message}")
+    for message, llm_message in zip(messages, llm_messages):
+        agent.logger.info("\n📝 Generated response: %s", llm_message)
         responses.append({
             "message_id": message.get("id"),
             "channel_id": message.get('channel_id'),
@@ -89,15 +92,25 @@ def deploy_token_discord(agent, **kwargs):
         })
 
     # json response -> reply to tweet
-    for response in responses:
-        message_id = response['message_id']
-        channel_id = response['channel_id']
-        reply_text = response['response']
-
+    def post_reply(response):
         agent.connection_manager.perform_action(
             connection_name="discord",
             action_name="reply-to-message",
-            params=[channel_id, message_id, reply_text]
+            params=[response['channel_id'], response['message_id'], response['response']]
         )
-        agent.logger.info(f"\n🚀 Posting reply: '{reply_text}'")
+        agent.logger.info("\n🚀 Posting reply: '%s'", response['response'])
+
+    list(agent.executor.map(post_reply, responses))
     return
+
+
+def _deploy_token_for_message(agent, message) -> dict:
+    agent.logger.info(message)
+    # url = f"{DEPLOY_TOKEN_URL}api/memecoin/create-for-user"
+    # data = {
+    #     "isTwitter": True,
+    #     "twitterHandle": tweet.get('username'),
+    #     "input": tweet.get('text'),
+    # }
+    # response = agent.http.post(url, json=data, timeout=10)
+    return DEPLOY_TOKEN_RESPONSE
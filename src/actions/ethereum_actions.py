@@ -5,7 +5,7 @@ from src.action_handler import register_action
 
 logger = logging.getLogger("actions.ethereum_actions")
 
-@register_action("get-token-by-ticker")
+@register_action("get-eth-token-by-ticker")
 def get_token_by_ticker(agent, **kwargs):
     """Get token address by ticker symbol"""
     try:
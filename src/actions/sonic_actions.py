@@ -10,7 +10,7 @@ logger = logging.getLogger("actions.sonic_actions")
 # or additional processing before/after calling the underlying connection methods.
 # Feel free to modify these handlers to add your own business logic!
 
-@register_action("get-token-by-ticker")
+@register_action("get-sonic-token-by-ticker")
 def get_token_by_ticker(agent, **kwargs):
     """Get token address by ticker symbol
     """
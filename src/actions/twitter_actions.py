@@ -1,15 +1,15 @@
+import queue
 import threading
 from src.action_handler import register_action
 from src.helpers import print_h_bar
 from src.prompts import REPLY_TWEET_PROMPT
-import requests
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 DEPLOY_TOKEN_URL = os.getenv("DEPLOY_TOKEN_URL")
 
+MENTION_QUEUE_SIZE = 100
+MENTION_WORKERS = 4
+
 
 @register_action("post-tweet")
 def post_tweet(agent, **kwargs):
@@ -34,8 +34,7 @@ def reply_to_tweet(agent, **kwargs):
         if not tweet_id:
             return
 
-        agent.logger.info(
-            f"\n💬 GENERATING REPLY to: {tweet.get('text', '')[:50]}...")
+        agent.logger.info("\n💬 GENERATING REPLY to: %.50s...", tweet.get('text', ''))
 
         base_prompt = REPLY_TWEET_PROMPT.format(tweet_text=tweet.get('text'))
         system_prompt = agent._construct_system_prompt()
@@ -43,7 +42,7 @@ def reply_to_tweet(agent, **kwargs):
             prompt=base_prompt, system_prompt=system_prompt)
 
         if reply_text:
-            agent.logger.info(f"\n🚀 Posting reply: '{reply_text}'")
+            agent.logger.info("\n🚀 Posting reply: '%s'", reply_text)
             agent.connection_manager.perform_action(
                 connection_name="twitter",
                 action_name="reply-to-tweet",
@@ -78,7 +77,7 @@ def like_tweet(agent, **kwargs):
                     replies[:agent.own_tweet_replies_count])
             return True
 
-        agent.logger.info(f"\n👍 LIKING TWEET: {tweet.get('text', '')[:50]}...")
+        agent.logger.info("\n👍 LIKING TWEET: %.50s...", tweet.get('text', ''))
 
         agent.connection_manager.perform_action(
             connection_name="twitter",
@@ -102,15 +101,50 @@ def respond_to_mentions(agent, **kwargs):  # REQUIRES TWITTER PREMIUM PLAN
         params=[filter_str]
     )
 
-    def process_tweets():
-        for tweet_data in stream_function:
-            tweet_id = tweet_data["id"]
-            tweet_text = tweet_data["text"]
-            agent.logger.info(f"Received a mention: {tweet_text}")
-
-    processing_thread = threading.Thread(target=process_tweets)
-    processing_thread.daemon = True
-    processing_thread.start()
+    mention_queue = queue.Queue(maxsize=MENTION_QUEUE_SIZE)
+    stream_ended = object()
+
+    def consume_mentions():
+        # Only reads the stream so bursts are buffered instead of waiting on LLM calls
+        try:
+            for tweet_data in stream_function:
+                mention_queue.put(tweet_data)
+        finally:
+            # One sentinel per worker so every reply thread exits once the stream ends
+            for _ in range(MENTION_WORKERS):
+                mention_queue.put(stream_ended)
+
+    def reply_to_mentions():
+        while True:
+            tweet_data = mention_queue.get()
+            if tweet_data is stream_ended:
+                mention_queue.task_done()
+                break
+            try:
+                tweet_id = tweet_data["id"]
+                tweet_text = tweet_data["text"]
+                agent.logger.info("Received a mention: %s", tweet_text)
+
+                reply_text = agent.prompt_llm(
+                    prompt=REPLY_TWEET_PROMPT.format(tweet_text=tweet_text),
+                    system_prompt=agent._construct_system_prompt())
+                if reply_text:
+                    agent.connection_manager.perform_action(
+                        connection_name="twitter",
+                        action_name="reply-to-tweet",
+                        params=[tweet_id, reply_text]
+                    )
+                    agent.logger.info("\n🚀 Posted reply to mention: '%s'", reply_text)
+            except Exception as e:
+                agent.logger.error("Failed to respond to mention: %s", e)
+            finally:
+                mention_queue.task_done()
+
+    # A fixed number of workers bounds concurrent LLM/reply calls to stay under provider rate limits
+    for target in [consume_mentions] + [reply_to_mentions] * MENTION_WORKERS:
+        processing_thread = threading.Thread(target=target)
+        processing_thread.daemon = True
+        processing_thread.start()
 
 
 @register_action("get-mentioned-tweets")
@@ -123,23 +157,25 @@ def get_mentioned_tweets(agent, **kwargs):
         action_name="get-mentioned-tweets",
     )
 
-    selected_tweets = []
-
-    for tweet in tweets:
-        tweet_id = tweet.get('id')
-        tweet_text = tweet.get('text')
-        tweet_author = tweet.get('author_id')
-        tweet_username = tweet.get('username')
-        if agent.connection_manager.perform_action(
-                connection_name="supabase",
-                action_name="check-subscribed-user",
-                params=[tweet_author]
-        ):
-            selected_tweets.append({
-                "tweet_id": tweet_id,
-                "text": tweet_text,
-                "username": tweet_username
-            })
+    if not tweets:
+        return []
+
+    # Look up every author in one query instead of one per tweet
+    subscribed_ids = set(agent.connection_manager.perform_action(
+        connection_name="supabase",
+        action_name="check-subscribed-users",
+        params=[[tweet.get('author_id') for tweet in tweets]]
+    ) or [])
+
+    selected_tweets = [
+        {
+            "tweet_id": tweet.get('id'),
+            "text": tweet.get('text'),
+            "username": tweet.get('username')
+        }
+        for tweet in tweets
+        if tweet.get('author_id') in subscribed_ids
+    ]
 
     agent.logger.info("\n✅ Tweets retrieved successfully!")
     return selected_tweets
@@ -153,14 +189,19 @@ def deploy_token(agent, **kwargs):
 
     tweets = get_mentioned_tweets(agent, **kwargs)
 
-    responses = []
-    for tweet in tweets:
+    if not tweets:
+        return []
+
+    def create_token(tweet):
         data = {
             "isTwitter": True,
             "twitterHandle": tweet.get('username'),
             "input": tweet.get('text'),
         }
-        response = requests.post(url, data=data)
-        responses.append(response.json())
+        response = agent.http.post(url, data=data, timeout=30)
+        return response.json()
+
+    # Each tweet is an independent request, so issue them concurrently
+    responses = list(agent.executor.map(create_token, tweets))
     agent.logger.info("\n✅ Deploy token successfully!")
     return responses
@@ -1,20 +1,63 @@
+import atexit
+import functools
+import hashlib
 import json
 import logging
+import random
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Any
-import src.actions.twitter_actions
-import src.actions.supabase_actions
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from src.action_handler import execute_action
-from src.connection_manager import ConnectionManager
-from src.helpers import print_h_bar
+from src.connection_manager import ConnectionManager, is_transient_error
+from src.helpers import print_h_bar, fast_json
 
 REQUIRED_FIELDS = ["name", "bio", "traits",
                    "examples", "loop_delay", "config", "tasks"]
 
+PROMPT_CACHE_DIR = Path.home() / ".zerepy" / "prompt_cache"
+
+LLM_MAX_CONCURRENCY = 4
+
+# Threads are only started on first submit, and reloading an agent reuses the same pool
+ACTION_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="zerepy")
+atexit.register(ACTION_EXECUTOR.shutdown, wait=False)
+
+ENV_MAX_ATTEMPTS = 10
+ENV_RETRY_BASE_DELAY = 0.25
+ENV_RETRY_MAX_DELAY = 8.0
+
+REACT_STEP_PATTERN = re.compile(r"(?s)^(?P<thought>.*?)\s*Action\s*\d+:\s*(?P<action>.+?)\s*$")
+
 logger = logging.getLogger("agent")
 
 
+def _parse_react_step(thought_action: str) -> Optional[tuple[str, str]]:
+    """Split an LLM "Thought/Action" completion, returning None if no action can be recovered"""
+    thought_action = thought_action.strip()
+    match = REACT_STEP_PATTERN.match(thought_action)
+    if match:
+        return match["thought"], match["action"]
+
+    # Missing "Action i:" label, assume the last line holds the action
+    lines = thought_action.rsplit("\n", 1)
+    if len(lines) == 2 and lines[1].strip():
+        return lines[0].strip(), lines[1].strip()
+    return None
+
+
+@functools.lru_cache(maxsize=32)
+def _load_agent_config(path: str, mtime: float) -> dict:
+    """Parse an agent file, memoized on its modification time so edits are picked up"""
+    with open(path, "rb") as f:
+        return fast_json.loads(f.read())
+
+
 class ZerePyAgent:
     def __init__(
             self,
@@ -22,7 +65,7 @@ class ZerePyAgent:
     ):
         try:
             agent_path = Path("agents") / f"{agent_name}.json"
-            agent_dict = json.load(open(agent_path, "r"))
+            agent_dict = _load_agent_config(str(agent_path), agent_path.stat().st_mtime)
 
             missing_fields = [
                 field for field in REQUIRED_FIELDS if field not in agent_dict]
@@ -40,20 +83,53 @@ class ZerePyAgent:
             self.time_based_multipliers = agent_dict["time_based_multipliers"]
             self.is_llm_set = False
 
-            # Cache for system prompt
+            # Cache for system prompt, keyed on the fields it is built from
             self._system_prompt = None
+            self._sys_prompt_hash = hashlib.sha1(
+                json.dumps([self.bio, self.traits, self.examples], sort_keys=True).encode()
+            ).hexdigest()
 
             # Extract loop tasks
             self.tasks = agent_dict.get("tasks", [])
             self.task_weights = [task.get("weight", 0) for task in self.tasks]
+            self._task_names = frozenset(task["name"] for task in self.tasks)
+
             self.logger = logging.getLogger("agent")
 
             # Set up empty agent state
             self.state = {}
+
+            # Shared HTTP session so action calls reuse pooled keep-alive connections
+            self._http = None
+            self._http_lock = threading.Lock()
+
+            # Worker pool for concurrent fan-out inside actions, shared by every agent loaded in this process
+            self.executor = ACTION_EXECUTOR
+            # Caps in-flight provider calls across threads to stay under rate limits
+            self._llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
         except Exception as e:
             logger.error("Could not load ZerePy agent")
             raise e
 
+    @property
+    def http(self) -> requests.Session:
+        """HTTP session shared by all actions for the lifetime of the agent"""
+        if self._http is None:
+            # First use is often from several executor threads at once; build only one session
+            with self._http_lock:
+                if self._http is None:
+                    session = requests.Session()
+                    session.headers.update({"Connection": "keep-alive"})
+                    adapter = HTTPAdapter(
+                        pool_connections=16,
+                        pool_maxsize=32,
+                        max_retries=Retry(total=3, backoff_factor=0.2)
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._http = session
+        return self._http
+
     def _setup_llm_provider(self):
         # Get first available LLM provider and its model
         llm_providers = self.connection_manager.get_model_providers()
@@ -64,6 +140,13 @@ class ZerePyAgent:
     def _construct_system_prompt(self) -> str:
         """Construct the system prompt from agent configuration"""
         if self._system_prompt is None:
+            cache_file = PROMPT_CACHE_DIR / f"{self._sys_prompt_hash}.txt"
+            try:
+                self._system_prompt = cache_file.read_text(encoding="utf-8")
+                return self._system_prompt
+            except OSError:
+                pass
+
             prompt_parts = []
             prompt_parts.extend(self.bio)
 
@@ -80,6 +163,12 @@ class ZerePyAgent:
 
             self._system_prompt = "\n".join(prompt_parts)
 
+            try:
+                PROMPT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                cache_file.write_text(self._system_prompt, encoding="utf-8")
+            except OSError as e:
+                logger.debug(f"Could not write system prompt cache: {e}")
+
         return self._system_prompt
 
     def _adjust_weights_for_time(self, current_hour: int, task_weights: list) -> list:
@@ -109,18 +198,72 @@ class ZerePyAgent:
             prompt: str,
             system_prompt: str = None,
             stop: Optional[list[str]] = None,
-            response_format: Optional[Any] = None
+            response_format: Optional[Any] = None,
+            stream: bool = False
     ) -> str:
         if not self.is_llm_set:
             self._setup_llm_provider()
         """Generate text using the configured LLM provider"""
         system_prompt = system_prompt or self._construct_system_prompt()
 
-        return self.connection_manager.perform_action(
+        # The system prompt is a stable prefix; the cache key lets providers that support
+        # prompt caching reuse it instead of re-processing it on every call
+        with self._llm_slots:
+            if stream and response_format is None and self._supports_streaming():
+                response = self._stream_llm(prompt, system_prompt, stop)
+            else:
+                response = self.connection_manager.perform_action(
+                    connection_name=self.model_provider,
+                    action_name="generate-text",
+                    params=[prompt, system_prompt, stop, response_format, None, self._sys_prompt_hash]
+                )
+        return response
+
+    def prompt_llm_many(self, prompts: list[str], system_prompts: list[str], **kwargs) -> list[str]:
+        """Run independent prompts concurrently on the agent executor, returning responses in order"""
+        if not self.is_llm_set:
+            self._setup_llm_provider()
+        # Identical requests are only sent once and share the response
+        pairs = list(zip(prompts, system_prompts))
+        futures = {}
+        for prompt, system_prompt in pairs:
+            if (prompt, system_prompt) not in futures:
+                futures[(prompt, system_prompt)] = self.executor.submit(
+                    self.prompt_llm, prompt=prompt, system_prompt=system_prompt, **kwargs)
+        return [futures[pair].result() for pair in pairs]
+
+    def _supports_streaming(self) -> bool:
+        connection = self.connection_manager.connections.get(self.model_provider)
+        return connection is not None and "generate-text-stream" in connection.actions
+
+    def _stream_llm(self, prompt: str, system_prompt: str, stop: Optional[list[str]]) -> Optional[str]:
+        """Stream a completion and stop reading as soon as a stop sequence shows up"""
+        chunks = self.connection_manager.perform_action(
             connection_name=self.model_provider,
-            action_name="generate-text",
-            params=[prompt, system_prompt, stop, response_format]
+            action_name="generate-text-stream",
+            params=[prompt, system_prompt, stop, None, self._sys_prompt_hash]
         )
+        if chunks is None:
+            return None
+
+        buffer = ""
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                if stop and any(sequence in buffer for sequence in stop):
+                    break
+        except Exception as e:
+            # Match perform_action, which logs provider errors and returns None
+            logger.error(f"\nAn error occurred while streaming from {self.model_provider}: {e}")
+            return None
+        finally:
+            chunks.close()
+
+        if stop:
+            cut = min((buffer.find(sequence) for sequence in stop if sequence in buffer), default=-1)
+            if cut != -1:
+                buffer = buffer[:cut]
+        return buffer
 
     def perform_action(self, connection: str, action: str, **kwargs) -> None:
         return self.connection_manager.perform_action(connection, action, **kwargs)
@@ -153,18 +296,19 @@ class ZerePyAgent:
                     n_calls, n_badcalls = 0, 0
                     self.steps = 0
                     self.answer = None
-                    prompt = ""
+                    steps = []
                     for i in range(1, 5):
+                        prompt = "".join(steps)
                         n_calls += 1
                         thought_action = self.prompt_llm(prompt=prompt + f"Thought {i}:",
                                                          system_prompt=system_prompt,
-                                                         stop=[f"Observation {i}:"])
+                                                         stop=[f"Observation {i}:"],
+                                                         stream=True)
                         logger.info(f"thought_action {thought_action}...")
-                        try:
-                            thought, action_name = thought_action.strip().split(
-                                f"Action {i}:")
-                            action_name = action_name.strip()
-                        except:
+                        parsed = _parse_react_step(thought_action)
+                        if parsed:
+                            thought, action_name = parsed
+                        else:
                             logger.info(f'ohh... {thought_action}')
                             n_badcalls += 1
                             n_calls += 1
@@ -178,14 +322,13 @@ class ZerePyAgent:
                             action_name[0].lower() + action_name[1:])
                         logger.info(f"return env {obs, r, done, info}...")
                         step_str = f"Thought {i}: {thought}\nAction {i}: {action_name}\nObservation {i}: {obs}\n"
-                        prompt += step_str
-                        logger.info(f"{prompt}...")
+                        steps.append(step_str)
+                        logger.info(f"{prompt}{step_str}...")
                         if done:
                             break
                     if not done:
                         obs, r, done, info = self.env("finish[]")
-                    task_exists = any(action['name'] == 'post-tweet' for action in self.tasks)
-                    if task_exists:
+                    if "post-tweet" in self._task_names:
                         logger.info(f"post-tweet started ...")
                         execute_action(self, "post-tweet")
                     logger.info(
@@ -219,17 +362,19 @@ class ZerePyAgent:
             n_calls, n_badcalls = 0, 0
             self.steps = 0
             self.answer = None
+            steps = [prompt]
             for i in range(1, 5):
+                prompt = "".join(steps)
                 n_calls += 1
                 thought_action = self.prompt_llm(prompt=prompt + f"Thought {i}:",
                                                  system_prompt=system_prompt,
-                                                 stop=[f"Observation {i}:"])
+                                                 stop=[f"Observation {i}:"],
+                                                 stream=True)
                 logger.info(f"thought_action {thought_action}...")
-                try:
-                    thought, action_name = thought_action.strip().split(
-                        f"Action {i}:")
-                    action_name = action_name.strip()
-                except:
+                parsed = _parse_react_step(thought_action)
+                if parsed:
+                    thought, action_name = parsed
+                else:
                     logger.info(f'ohh... {thought_action}')
                     n_badcalls += 1
                     n_calls += 1
@@ -243,8 +388,8 @@ class ZerePyAgent:
                     action_name[0].lower() + action_name[1:])
                 logger.info(f"return env {obs, r, done, info}...")
                 step_str = f"Thought {i}: {thought}\nAction {i}: {action_name}\nObservation {i}: {obs}\n"
-                prompt += step_str
-                logger.info(f"{prompt}...")
+                steps.append(step_str)
+                logger.info(f"{prompt}{step_str}...")
                 if done:
                     break
             if not done:
@@ -255,12 +400,19 @@ class ZerePyAgent:
             return
 
     def env(self, action):
-        attempts = 0
-        while attempts < 10:
+        backoff = ENV_RETRY_BASE_DELAY
+        for attempt in range(1, ENV_MAX_ATTEMPTS + 1):
             try:
-                return self.step(action)
-            except:
-                attempts += 1
+                # perform_action normally logs and swallows errors; surface transient ones so they are retried
+                with self.connection_manager.propagate_transient_errors():
+                    return self.step(action)
+            except Exception as e:
+                if attempt == ENV_MAX_ATTEMPTS or not is_transient_error(e):
+                    raise
+                logger.warning(f"Step {action} failed (attempt {attempt}/{ENV_MAX_ATTEMPTS}): {e}")
+                # Exponential backoff with jitter so transient provider errors are not hammered
+                time.sleep(backoff + random.random() * 0.1)
+                backoff = min(backoff * 2, ENV_RETRY_MAX_DELAY)
 
     def _get_info_env(self):
         return {
@@ -1,5 +1,8 @@
 import logging
+import threading
+from contextlib import contextmanager
 from typing import Any, List, Optional, Type, Dict
+import requests
 from src.connections.base_connection import BaseConnection
 from src.connections.anthropic_connection import AnthropicConnection
 from src.connections.eternalai_connection import EternalAIConnection
@@ -25,10 +28,25 @@ from src.connections.supabase_connection import SupabaseConnection
 
 logger = logging.getLogger("connection_manager")
 
+# Network failures worth retrying; connections often wrap them in their own error types
+TRANSIENT_ERRORS = (requests.RequestException, TimeoutError, ConnectionError)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True if error, or an exception it was raised from, is a transient network failure"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
 
 class ConnectionManager:
     def __init__(self, agent_config):
         self.connections: Dict[str, BaseConnection] = {}
+        self._propagate = threading.local()
         for config in agent_config:
             self._register_connection(config)
 
@@ -216,11 +234,24 @@ class ConnectionManager:
             return connection.perform_action(action_name, kwargs)
 
         except Exception as e:
+            if getattr(self._propagate, "transient", False) and is_transient_error(e):
+                raise
             logging.error(
                 f"\nAn error occurred while trying action {action_name} for {connection_name} connection: {e}"
             )
             return None
 
+    @contextmanager
+    def propagate_transient_errors(self):
+        """Let transient network errors from perform_action reach the caller on this thread instead of
+        being logged and turned into None, so the caller can retry them"""
+        previous = getattr(self._propagate, "transient", False)
+        self._propagate.transient = True
+        try:
+            yield
+        finally:
+            self._propagate.transient = previous
+
     def get_model_providers(self) -> List[str]:
         """Get a list of all LLM provider connections"""
         return [
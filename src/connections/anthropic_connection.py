@@ -141,7 +141,14 @@ class AnthropicConnection(BaseConnection):
                 model=model,
                 max_tokens=1000,
                 temperature=0,
-                system=system_prompt,
+                # Mark the system prompt as a cacheable prefix so repeated calls hit the prompt cache
+                system=[
+                    {
+                        "type": "text",
+                        "text": system_prompt,
+                        "cache_control": {"type": "ephemeral"}
+                    }
+                ],
                 messages=[
                     {
                         "role": "user",
@@ -211,7 +211,7 @@ class EternalAIConnection(BaseConnection):
                 try:
                     if completion.onchain_data is not None:
                         logger.info(f"response onchain data: {json.dumps(completion.onchain_data, indent=4)}")
-                except:
+                except (TypeError, ValueError, AttributeError):
                     logger.info(f"response onchain data object: {completion.onchain_data}", )
                 logger.info(
                     f"end call completions api with content:\n\n {completion.choices[0].message.content} \n\n\n\n")
@@ -229,7 +229,7 @@ class EternalAIConnection(BaseConnection):
                         try:
                             if chunk.onchain_data is not None and chunk.onchain_data.infer_id is not None and chunk.onchain_data.infer_id != "":
                                 logger.info(f"response onchain data: {json.dumps(chunk.onchain_data, indent=4)}")
-                        except:
+                        except (TypeError, ValueError, AttributeError):
                             logger.info(f"response onchain data object: {chunk.onchain_data}", )
                         break
                 logger.info(f"end call completions api with content:\n\n {content} \n\n\n\n")
@@ -1,17 +1,63 @@
+import asyncio
+import functools
 import logging
 import os
+import random
+import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import aiohttp
 import requests
-from typing import Dict, Any, Optional, Union
-from dotenv import load_dotenv, set_key
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
-from src.constants.networks import EVM_NETWORKS
-from src.constants.abi import ERC20_ABI
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Tuple, Union
+from dotenv import load_dotenv
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3, WebsocketProviderV2
+from web3.exceptions import TransactionNotFound
+from web3.middleware import async_geth_poa_middleware, geth_poa_middleware
+from src.constants.networks import EVM_NETWORKS, DECIMALS_OVERRIDES
+from src.helpers import fast_json
+from src.helpers.env_file import update_env_file
+from src.helpers.token_cache import TokenCache
+from eth_abi import decode
+from eth_account import Account
+from src.constants.abi import ERC20_ABI, MULTICALL3_ABI, MULTICALL3_ADDRESS
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
 logger = logging.getLogger("connections.evm_connection")
 
+DEXSCREENER_SEARCH_URL = "https://api.dexscreener.com/latest/dex/search"
+KYBERSWAP_API_URL = "https://aggregator-api.kyberswap.com/{network}/api/v1"
+KYBERSWAP_HEADERS = {"x-client-id": "zerepy"}
+
+# Blocks and reward percentile sampled by eth_feeHistory when pricing EIP-1559 transactions
+FEE_HISTORY_BLOCKS = 5
+FEE_HISTORY_PERCENTILE = 50
+
+# Concurrent eth_calls allowed per bulk balance scan, to stay under RPC rate limits
+BULK_BALANCE_CONCURRENCY = 20
+
+WEB3_INIT_ATTEMPTS = 3
+WEB3_RETRY_BASE_DELAY = 0.1
+WEB3_RETRY_MAX_DELAY = 5.0
+
+NATIVE_TICKERS = frozenset({"eth", "ethereum", "matic"})
+
+PRIVATE_KEY_PATTERN = re.compile(r"0x[0-9a-fA-F]{64}")
+
+
+@functools.lru_cache(maxsize=4096)
+def _checksum(address: str) -> str:
+    """Checksum an address; each conversion is a keccak256 hash, so repeats are served from cache"""
+    return Web3.to_checksum_address(address)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_private_key() -> Optional[str]:
+    """Read the wallet key once; configure() and refresh_env() clear the cache"""
+    return os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
+
 
 class EVMConnectionError(Exception):
     """Base exception for EVM connection errors"""
@@ -21,10 +67,31 @@ class EVMConnectionError(Exception):
 class EVMConnection(BaseConnection):
     def __init__(self, config: Dict[str, Any]):
         logger.info("Initializing EVM connection...")
+        # .env is read once here; call refresh_env() to pick up later edits
+        load_dotenv()
         self.NATIVE_TOKEN = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+        self._native_token_lower = self.NATIVE_TOKEN.lower()
 
             # Determine network from config (defaulting to 'ethereum')
         self._web3 = None
+        self._web3_lock = threading.Lock()
+        self._account = None
+        self._multicall = None
+        self._decimals_cache: Dict[str, int] = {}
+        # web3 rebuilds every ABI function class when a contract is created, so reuse them per token
+        self._erc20_contracts: Dict[str, Any] = {}
+        self._erc20_factory = None
+        self._token_cache = TokenCache()
+        # Concurrent identical lookups share one outbound request
+        self._inflight: Dict[Tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # Overlaps independent RPC reads with aggregator HTTP calls
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="evm")
+        # Background event loop owning the shared aiohttp pool and AsyncWeb3 provider, started on first use
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._aiohttp = None
+        self._async_web3 = None
         self.network = config.get("network", "ethereum")
         if self.network not in EVM_NETWORKS:
             raise ValueError(
@@ -34,14 +101,45 @@ class EVMConnection(BaseConnection):
         
         # Get RPC URL: either from the config override or from the network defaults
         self.rpc_url = config.get("rpc") or network_config["rpc_url"]
+        # Optional websocket endpoint, used to wait for receipts on new block heads instead of polling
+        self.ws_url = config.get("ws_rpc") or network_config.get("ws_url")
         self.scanner_url = network_config["scanner_url"]
         self.chain_id = network_config["chain_id"]
+        self.block_time = network_config.get("block_time", 2)
+
+        # decimals() never changes for a deployed token, keyed by checksum address and
+        # seeded with the well-known tokens of this chain
+        self._decimals_cache.update(
+            (_checksum(address), decimals)
+            for address, decimals in DECIMALS_OVERRIDES.get(self.chain_id, {}).items()
+        )
         
+        # Pooled keep-alive session shared by the RPC provider and the DEXScreener/aggregator APIs.
+        # The pool is sized well above urllib3's default of 10 so concurrent RPC calls don't queue
+        self._http = requests.Session()
+        self._http.headers.update({"Connection": "keep-alive"})
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            # Read and status retries stay limited to urllib3's idempotent methods: JSON-RPC goes out as
+            # POST, and resending eth_sendRawTransaction after a lost reply would report a broadcast
+            # transaction as failed. Connect errors are still retried for every method
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 502, 503, 504]
+            )
+        )
+        self._http.mount("https://", adapter)
+        self._http.mount("http://", adapter)
+
+        # Web3 is connected lazily on first use, see the web3 property
         super().__init__(config)
-        self._initialize_web3()
         
         # Kyberswap aggregator API for best swap routes
-        self.aggregator_api = f"https://aggregator-api.kyberswap.com/{self.network}/api/v1"
+        self.aggregator_api = KYBERSWAP_API_URL.format(network=self.network)
+        self._swap_route_url = f"{self.aggregator_api}/routes"
+        self._swap_build_url = f"{self.aggregator_api}/route/build"
 
     def _get_explorer_link(self, tx_hash: str) -> str:
         """Generate block explorer link for transaction"""
@@ -50,26 +148,77 @@ class EVMConnection(BaseConnection):
     def _initialize_web3(self) -> None:
         """Initialize Web3 connection with retry logic"""
         if not self._web3:
-            for attempt in range(3):
+            for attempt in range(WEB3_INIT_ATTEMPTS):
                 try:
-                    self._web3 = Web3(Web3.HTTPProvider(self.rpc_url))
-                    self._web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+                    web3 = Web3(Web3.HTTPProvider(
+                        self.rpc_url, session=self._http, request_kwargs={"timeout": 15}))
+                    web3.middleware_onion.inject(geth_poa_middleware, layer=0)
                     
-                    if not self._web3.is_connected():
-                        raise EthereumConnectionError("Failed to connect to Ethereum network")
+                    if not web3.is_connected():
+                        raise EVMConnectionError("Failed to connect to Ethereum network")
                     
-                    chain_id = self._web3.eth.chain_id
+                    chain_id = web3.eth.chain_id
                     if chain_id != self.chain_id:
-                        raise EthereumConnectionError(f"Connected to wrong chain. Expected {self.chain_id}, got {chain_id}")
+                        raise EVMConnectionError(f"Connected to wrong chain. Expected {self.chain_id}, got {chain_id}")
                         
                     logger.info(f"Connected to {self.network} network with chain ID: {chain_id}")
+                    # The chain is verified, answer every later eth_chainId lookup locally
+                    web3.middleware_onion.add(self._static_chain_id_middleware, name="static_chain_id")
+                    # Only publish the instance once it is verified, so a failed attempt is retried later
+                    self._web3 = web3
                     break
                     
                 except Exception as e:
-                    if attempt == 2:
-                        raise EthereumConnectionError(f"Failed to initialize Web3 after 3 attempts: {str(e)}")
+                    if attempt == WEB3_INIT_ATTEMPTS - 1:
+                        raise EVMConnectionError(
+                            f"Failed to initialize Web3 after {WEB3_INIT_ATTEMPTS} attempts: {str(e)}")
                     logger.warning(f"Web3 initialization attempt {attempt + 1} failed: {str(e)}")
-                    time.sleep(1)
+                    delay = min(WEB3_RETRY_MAX_DELAY, WEB3_RETRY_BASE_DELAY * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def _static_chain_id_middleware(self, make_request, w3):
+        chain_id_hex = hex(self.chain_id)
+
+        def middleware(method, params):
+            if method == "eth_chainId":
+                return {"jsonrpc": "2.0", "id": 0, "result": chain_id_hex}
+            return make_request(method, params)
+        return middleware
+
+    @property
+    def web3(self) -> Web3:
+        """Web3 instance, connected on first access"""
+        if self._web3 is None:
+            with self._web3_lock:
+                self._initialize_web3()
+        return self._web3
+
+    def _run_async(self, coro):
+        """Run a coroutine on the connection's background event loop and wait for its result"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="evm-async", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _get_aiohttp_session(self) -> aiohttp.ClientSession:
+        """Keep-alive aiohttp pool shared by every async call; only touched from the background loop"""
+        if self._aiohttp is None or self._aiohttp.closed:
+            self._aiohttp = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self._aiohttp
+
+    async def _get_async_web3(self) -> AsyncWeb3:
+        """AsyncWeb3 instance backed by the shared aiohttp pool"""
+        if self._async_web3 is None:
+            provider = AsyncHTTPProvider(self.rpc_url, request_kwargs={"timeout": 15})
+            await provider.cache_async_session(await self._get_aiohttp_session())
+            async_web3 = AsyncWeb3(provider)
+            async_web3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+            self._async_web3 = async_web3
+        return self._async_web3
 
     @property
     def is_llm_provider(self) -> bool:
@@ -93,6 +242,13 @@ class EVMConnection(BaseConnection):
                 ],
                 description="Get token address by ticker symbol"
             ),
+            "get-tokens-by-tickers": Action(
+                name="get-tokens-by-tickers",
+                parameters=[
+                    ActionParameter("tickers", True, list, "Token ticker symbols to look up")
+                ],
+                description="Get token addresses for several ticker symbols at once"
+            ),
             "get-balance": Action(
                 name="get-balance",
                 parameters=[
@@ -100,6 +256,13 @@ class EVMConnection(BaseConnection):
                 ],
                 description="Get ETH or token balance"
             ),
+            "get-balances": Action(
+                name="get-balances",
+                parameters=[
+                    ActionParameter("token_addresses", True, list, "Token addresses to check, native token included")
+                ],
+                description="Get balances of several tokens at once"
+            ),
             "transfer": Action(
                 name="transfer", 
                 parameters=[
@@ -137,30 +300,30 @@ class EVMConnection(BaseConnection):
                 return True
 
         try:
-            if not os.path.exists('.env'):
-                with open('.env', 'w') as f:
-                    f.write('')
-
             # Get wallet private key from user input
             private_key = input("\nEnter your wallet private key: ")
             if not private_key.startswith('0x'):
                 private_key = '0x' + private_key
                 
             # Validate private key format
-            if len(private_key) != 66 or not all(c in '0123456789abcdefABCDEF' for c in private_key[2:]):
+            if not PRIVATE_KEY_PATTERN.fullmatch(private_key):
                 raise ValueError("Invalid private key format")
             
             # Test private key by deriving address
-            account = self._web3.eth.account.from_key(private_key)
+            account = self.web3.eth.account.from_key(private_key)
             logger.info(f"\nDerived address: {account.address}")
             
             # Optional block explorer API key input
             explorer_key = input("\nEnter your block explorer API key (optional, press Enter to skip): ")
             
-            # Save credentials using the unified EVM_PRIVATE_KEY variable
-            set_key('.env', 'EVM_PRIVATE_KEY', private_key)
+            # Save credentials using the unified EVM_PRIVATE_KEY variable, in a single .env write
+            credentials = {'EVM_PRIVATE_KEY': private_key}
             if explorer_key:
-                set_key('.env', 'ETH_EXPLORER_KEY', explorer_key)
+                credentials['ETH_EXPLORER_KEY'] = explorer_key
+            update_env_file(credentials)
+            os.environ['EVM_PRIVATE_KEY'] = private_key
+            _load_private_key.cache_clear()
+            self._account = account
 
             logger.info("\n✅ Ethereum configuration saved successfully!")
             return True
@@ -172,21 +335,20 @@ class EVMConnection(BaseConnection):
     def is_configured(self, verbose: bool = False) -> bool:
         """Check if Ethereum connection is properly configured"""
         try:
-            load_dotenv()
-            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
-            if not private_key:
+            # The key check needs no RPC, so a missing key is reported without connecting
+            account = self._get_account()
+            if account is None:
                 if verbose:
                     logger.error("Missing EVM_PRIVATE_KEY or ETH_PRIVATE_KEY in .env")
                 return False
 
-            if not self._web3 or not self._web3.is_connected():
+            if not self.web3:
                 if verbose:
                     logger.error("Not connected to Ethereum network")
                 return False
-                
-            # Test account access
-            account = self._web3.eth.account.from_key(private_key)
-            _ = self._web3.eth.get_balance(account.address)
+
+            # A successful balance call also proves the RPC is reachable
+            _ = self.web3.eth.get_balance(account.address)
             return True
 
         except Exception as e:
@@ -194,51 +356,242 @@ class EVMConnection(BaseConnection):
                 logger.error(f"Configuration check failed: {str(e)}")
             return False
 
+    def refresh_env(self) -> None:
+        """Re-read .env and drop the cached wallet"""
+        load_dotenv(override=True)
+        _load_private_key.cache_clear()
+        self._account = None
+
+    def _get_account(self):
+        """Derive the wallet account from the private key once and reuse it"""
+        if self._account is None:
+            private_key = _load_private_key()
+            if not private_key:
+                return None
+            # Deriving the address is local, so it must not force the lazy Web3 connection
+            self._account = Account.from_key(private_key)
+        return self._account
+
     def get_address(self) -> str:
         try:
-            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
-            account = self._web3.eth.account.from_key(private_key)
+            account = self._get_account()
             return f"Your Ethereum address: {account.address}"
         except Exception as e:
             return f"Failed to get address: {str(e)}"
 
+    def _rpc_batch(self, calls: List[Tuple[str, List[Any]]], optional: Tuple[int, ...] = ()) -> List[Any]:
+        """
+        Send several JSON-RPC calls in a single HTTP request and return their results in order.
+        A call whose index is in optional yields None instead of failing the batch when it errors.
+        Endpoints that do not support batching get the calls one at a time instead.
+        """
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        response = self._http.post(self.rpc_url, json=payload, timeout=15)
+        # Nodes without batch support answer with a 4xx, a single error object, or replies lacking ids
+        replies = {}
+        if not (400 <= response.status_code < 500 and response.status_code != 429):
+            response.raise_for_status()
+            decoded = fast_json.loads(response.content)
+            if isinstance(decoded, list):
+                # Replies may come back in any order; some nodes echo the ids as strings
+                replies = {str(reply.get("id")): reply for reply in decoded if isinstance(reply, dict)}
+        if any(str(i) not in replies for i in range(len(calls))):
+            logger.debug(f"RPC endpoint rejected the batch, sending {len(calls)} calls individually")
+            ordered = [self.web3.provider.make_request(method, params) for method, params in calls]
+        else:
+            ordered = [replies[str(i)] for i in range(len(calls))]
+
+        errors = [reply["error"] for i, reply in enumerate(ordered) if "error" in reply and i not in optional]
+        if errors:
+            raise EVMConnectionError(f"Batch RPC failed: {errors}")
+        return [reply.get("result") for reply in ordered]
+
+    def _get_nonce_and_fees(self, address: str, *calls: Tuple[str, List[Any]]) -> List[Any]:
+        """
+        Fetch the nonce and transaction fee fields, plus any extra JSON-RPC reads, in one batched request.
+        Fees are EIP-1559 maxFeePerGas/maxPriorityFeePerGas derived from eth_feeHistory, or a legacy
+        gasPrice on chains without a base fee or RPCs that do not support eth_feeHistory.
+        """
+        nonce_hex, gas_price_hex, fee_history, *extra = self._rpc_batch([
+            ("eth_getTransactionCount", [address, "latest"]),
+            ("eth_gasPrice", []),
+            ("eth_feeHistory", [FEE_HISTORY_BLOCKS, "latest", [FEE_HISTORY_PERCENTILE]]),
+            *calls
+        ], optional=(2,))
+        return [int(nonce_hex, 16), self._fee_params(int(gas_price_hex, 16), fee_history), *extra]
+
+    @staticmethod
+    def _fee_params(gas_price: int, fee_history: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        base_fees = (fee_history or {}).get("baseFeePerGas") or []
+        if not base_fees or not int(base_fees[-1], 16):
+            return {'gasPrice': gas_price}
+        # The last entry is the base fee of the pending block
+        base_fee = int(base_fees[-1], 16)
+        tips = sorted(int(reward[0], 16) for reward in fee_history.get("reward") or [] if reward)
+        tip = tips[len(tips) // 2] if tips else max(gas_price - base_fee, 0)
+        return {'maxFeePerGas': base_fee * 2 + tip, 'maxPriorityFeePerGas': tip}
+
+    def _multicall3(self, calls: List[Tuple[str, str]]) -> List[bytes]:
+        """Run several read-only contract calls in a single eth_call through Multicall3"""
+        if self._multicall is None:
+            self._multicall = self.web3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        results = self._multicall.functions.aggregate3(
+            [(target, False, call_data) for target, call_data in calls]
+        ).call()
+        return [return_data for _, return_data in results]
+
+    def _erc20(self, token_address: str):
+        """Return the ERC20 contract wrapper for a token, building it only once"""
+        token_address = _checksum(token_address)
+        contract = self._erc20_contracts.get(token_address)
+        if contract is None:
+            if self._erc20_factory is None:
+                # Parse ERC20_ABI into a contract class once, then only bind addresses
+                self._erc20_factory = self.web3.eth.contract(abi=ERC20_ABI)
+            contract = self._erc20_contracts.setdefault(token_address, self._erc20_factory(address=token_address))
+        return contract
+
+    def _token_decimals(self, token_address: str) -> int:
+        """Return a token's decimals, calling the contract only on the first lookup"""
+        token_address = _checksum(token_address)
+        decimals = self._cached_decimals(token_address)
+        if decimals is None:
+            decimals = self._erc20(token_address).functions.decimals().call()
+            self._remember_decimals(token_address, decimals)
+        return decimals
+
+    def _cached_decimals(self, token_address: str) -> Optional[int]:
+        """Look up decimals in memory first, then in the on-disk token cache"""
+        decimals = self._decimals_cache.get(token_address)
+        if decimals is None:
+            decimals = self._token_cache.get_decimals(self.network, token_address)
+            if decimals is not None:
+                self._decimals_cache[token_address] = decimals
+        return decimals
+
+    def _remember_decimals(self, token_address: str, decimals: int) -> None:
+        self._decimals_cache[token_address] = decimals
+        self._token_cache.set_decimals(self.network, token_address, decimals)
+
+    def _get_token_balance(self, token_address: str, owner: str) -> float:
+        """Fetch decimals and balanceOf for a token in one round trip"""
+        contract = self._erc20(token_address)
+        decimals = self._cached_decimals(contract.address)
+        if decimals is not None:
+            return contract.functions.balanceOf(owner).call() / (10 ** decimals)
+
+        decimals_data, balance_data = self._multicall3([
+            (contract.address, contract.encodeABI(fn_name="decimals")),
+            (contract.address, contract.encodeABI(fn_name="balanceOf", args=[owner])),
+        ])
+        decimals = decode(["uint8"], decimals_data)[0]
+        self._remember_decimals(contract.address, decimals)
+        balance = decode(["uint256"], balance_data)[0]
+        return balance / (10 ** decimals)
+
+    def _single_flight(self, key: Tuple, fn, *args):
+        """Run fn(*args) once for all concurrent callers using the same key"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+        return future.result()
+
+    def _select_token_address(self, data: Dict[str, Any], ticker: str) -> Optional[str]:
+        """Pick the base token address of the most liquid/active matching pair in a DEXScreener response"""
+        if not data.get('pairs'):
+            return None
+
+        # Single pass: keep the most liquid/active pair on this network whose base symbol matches
+        ticker_lower = ticker.lower()
+        network_lower = self.network.lower()
+        best_pair = None
+        best_score = -1.0
+        for pair in data["pairs"]:
+            if pair.get("chainId", "").lower() != network_lower:
+                continue
+            if pair.get("baseToken", {}).get("symbol", "").lower() != ticker_lower:
+                continue
+            score = float((pair.get("liquidity") or {}).get("usd") or 0) * \
+                float((pair.get("volume") or {}).get("h24") or 0)
+            if score > best_score:
+                best_score, best_pair = score, pair
+
+        if best_pair is None:
+            return None
+        address = best_pair["baseToken"].get("address")
+        if address:
+            self._token_cache.set(self.network, ticker, address)
+        return address
+
     def _get_token_address(self, ticker: str) -> Optional[str]:
         """Helper function to get token address from DEXScreener"""
+        return self._single_flight(("token_address", ticker.lower()), self._fetch_token_address, ticker)
+
+    def _fetch_token_address(self, ticker: str) -> Optional[str]:
+        cached = self._token_cache.get(self.network, ticker)
+        if cached:
+            return cached
         try:
-            response = requests.get(f"https://api.dexscreener.com/latest/dex/search?q={ticker}")
+            response = self._http.get(DEXSCREENER_SEARCH_URL, params={"q": ticker}, timeout=5)
             response.raise_for_status()
-            data = response.json()
-            if not data.get('pairs'):
-                return None
-
-            # Filter pairs for the current network (using lowercase for comparison)
-            network_pairs = [
-                pair for pair in data["pairs"] 
-                if pair.get("chainId", "").lower() == self.network.lower()
-            ]
-            
-            # Sort by liquidity/volume
-            network_pairs.sort(
-                key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0) * 
-                            float(x.get('volume', {}).get('h24', 0) or 0),
-                reverse=True
-            )
+            return self._select_token_address(fast_json.loads(response.content), ticker)
 
-            # Find exact ticker match
-            for pair in network_pairs:
-                base_token = pair.get("baseToken", {})
-                if base_token.get("symbol", "").lower() == ticker.lower():
-                    return base_token.get("address")
-            
+        except Exception as error:
+            logger.error(f"Error fetching token address: {str(error)}")
             return None
 
+    async def _get_token_address_async(self, session: aiohttp.ClientSession, ticker: str) -> Optional[str]:
+        """Async variant of _get_token_address sharing the caller's aiohttp session"""
+        cached = self._token_cache.get(self.network, ticker)
+        if cached:
+            return cached
+        try:
+            async with session.get(DEXSCREENER_SEARCH_URL, params={"q": ticker}) as response:
+                response.raise_for_status()
+                data = fast_json.loads(await response.read())
+            return self._select_token_address(data, ticker)
+
         except Exception as error:
-            logger.error(f"Error fetching token address: {str(error)}")
+            logger.error(f"Error fetching token address for {ticker}: {str(error)}")
             return None
 
+    async def _get_token_addresses_async(self, tickers: List[str]) -> List[Optional[str]]:
+        session = await self._get_aiohttp_session()
+        return await asyncio.gather(
+            *(self._get_token_address_async(session, ticker) for ticker in tickers)
+        )
+
+    def get_tokens_by_tickers(self, tickers: List[str]) -> Dict[str, Optional[str]]:
+        """Resolve several tickers concurrently, returning a ticker -> address mapping"""
+        addresses: Dict[str, Optional[str]] = {}
+        lookups = []
+        for ticker in dict.fromkeys(tickers):
+            if ticker.lower() in NATIVE_TICKERS:
+                addresses[ticker] = self.NATIVE_TOKEN
+            else:
+                lookups.append(ticker)
+        if lookups:
+            addresses.update(zip(lookups, self._run_async(self._get_token_addresses_async(lookups))))
+        return addresses
+
     def get_token_by_ticker(self, ticker: str) -> str:
         try:
-            if ticker.lower() in ["eth", "ethereum", "matic"]:
+            if ticker.lower() in NATIVE_TICKERS:
                 return f"{self.NATIVE_TOKEN}"
             address = self._get_token_address(ticker)
             if address:
@@ -246,19 +599,13 @@ class EVMConnection(BaseConnection):
         except Exception as error:
             return False
 
-    def _get_raw_balance(self, address: str, token_address: Optional[str] = None) -> float:
-        """Helper function to get raw balance value"""
-        if token_address and token_address.lower() != self.NATIVE_TOKEN.lower():
-            contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address),
-                abi=ERC20_ABI
-            )
-            balance = contract.functions.balanceOf(Web3.to_checksum_address(address)).call()
-            decimals = contract.functions.decimals().call()
-            return balance / (10 ** decimals)
+    def _fetch_balance(self, address: str, token_address: Optional[str] = None) -> float:
+        owner = _checksum(address)
+        if token_address and token_address.lower() != self._native_token_lower:
+            return self._get_token_balance(token_address, owner)
         else:
-            balance = self._web3.eth.get_balance(Web3.to_checksum_address(address))
-            return self._web3.from_wei(balance, 'ether')
+            balance = self.web3.eth.get_balance(owner)
+            return self.web3.from_wei(balance, 'ether')
 
     def get_balance(self, token_address: Optional[str] = None) -> float:
         """
@@ -266,59 +613,79 @@ class EVMConnection(BaseConnection):
         If token_address is None, the native token balance is returned.
         """
         try:
-            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
-            if not private_key:
+            account = self._get_account()
+            if account is None:
                 return "No wallet private key configured in .env"
             
-            account = self._web3.eth.account.from_key(private_key)
-            
-            if token_address is None:
-                raw_balance = self._web3.eth.get_balance(account.address)
-                return self._web3.from_wei(raw_balance, 'ether')
-            
-            token_contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address), 
-                abi=ERC20_ABI 
-            )
-            decimals = token_contract.functions.decimals().call()
-            raw_balance = token_contract.functions.balanceOf(account.address).call()
-            token_balance = raw_balance / (10 ** decimals)
-            return token_balance
+            # Concurrent reads of the same balance (e.g. parallel swaps) share one RPC round trip
+            key = ("balance", account.address.lower(), (token_address or "").lower())
+            return self._single_flight(key, self._fetch_balance, account.address, token_address)
         
         except Exception as e:
             return False
 
+    async def _get_balances_async(self, owner: str, tokens: List[str]) -> List[Any]:
+        async_web3 = await self._get_async_web3()
+        limit = asyncio.Semaphore(BULK_BALANCE_CONCURRENCY)
+
+        async def balance_of(token: str) -> float:
+            async with limit:
+                if not token or token.lower() == self._native_token_lower:
+                    return async_web3.from_wei(await async_web3.eth.get_balance(owner), 'ether')
+                token_address = _checksum(token)
+                contract = async_web3.eth.contract(address=token_address, abi=ERC20_ABI)
+                decimals = self._cached_decimals(token_address)
+                if decimals is None:
+                    decimals = await contract.functions.decimals().call()
+                    self._remember_decimals(token_address, decimals)
+                return await contract.functions.balanceOf(owner).call() / (10 ** decimals)
+
+        return await asyncio.gather(*(balance_of(token) for token in tokens), return_exceptions=True)
+
+    def get_balances(self, token_addresses: List[str]) -> Dict[str, Any]:
+        """
+        Get balances of several tokens for the configured wallet concurrently.
+        Tokens whose lookup fails map to False, like get_balance.
+        """
+        account = self._get_account()
+        if account is None:
+            return "No wallet private key configured in .env"
+        tokens = list(dict.fromkeys(token_addresses))
+        results = self._run_async(self._get_balances_async(account.address, tokens))
+        balances = {}
+        for token, result in zip(tokens, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to get balance of {token}: {result}")
+                result = False
+            balances[token] = result
+        return balances
+
     def _prepare_transfer_tx(self, to_address: str, amount: float, token_address: Optional[str] = None) -> Dict[str, Any]:
         """Prepare transfer transaction with proper gas estimation"""
         try:
-            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
-            account = self._web3.eth.account.from_key(private_key)
-            nonce = self._web3.eth.get_transaction_count(account.address)
-            gas_price = self._web3.eth.gas_price
+            account = self._get_account()
+            nonce, fees = self._get_nonce_and_fees(account.address)
             
-            if token_address and token_address.lower() != self.NATIVE_TOKEN.lower():
-                contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=ERC20_ABI
-                )
-                decimals = contract.functions.decimals().call()
+            if token_address and token_address.lower() != self._native_token_lower:
+                contract = self._erc20(token_address)
+                decimals = self._token_decimals(contract.address)
                 amount_raw = int(amount * (10 ** decimals))
                 tx = contract.functions.transfer(
-                    Web3.to_checksum_address(to_address),
+                    _checksum(to_address),
                     amount_raw
                 ).build_transaction({
                     'from': account.address,
                     'nonce': nonce,
-                    'gasPrice': gas_price,
+                    **fees,
                     'chainId': self.chain_id
                 })
             else:
                 tx = {
                     'nonce': nonce,
-                    'to': Web3.to_checksum_address(to_address),
-                    'value': self._web3.to_wei(amount, 'ether'),
+                    'to': _checksum(to_address),
+                    'value': self.web3.to_wei(amount, 'ether'),
                     'gas': 21000,
-                    'gasPrice': gas_price,
+                    **fees,
                     'chainId': self.chain_id
                 }
             return tx
@@ -334,10 +701,9 @@ class EVMConnection(BaseConnection):
             if current_balance < amount:
                 raise ValueError(f"Insufficient balance. Required: {amount}, Available: {current_balance}")
             tx = self._prepare_transfer_tx(to_address, amount, token_address)
-            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
-            account = self._web3.eth.account.from_key(private_key)
+            account = self._get_account()
             signed = account.sign_transaction(tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed.rawTransaction)
+            tx_hash = self.web3.eth.send_raw_transaction(signed.rawTransaction)
             tx_url = self._get_explorer_link(tx_hash.hex())
             return tx_url
 
@@ -345,21 +711,16 @@ class EVMConnection(BaseConnection):
             logger.error(f"Transfer failed: {str(e)}")
             raise
 
-    def _get_swap_route(self, token_in: str, token_out: str, amount: float, sender: str) -> Dict:
-        """Get optimal swap route from Kyberswap API"""
+    def _get_swap_route(self, token_in: str, token_out: str, amount: float, sender: str) -> Tuple[Dict, int]:
+        """Get optimal swap route from Kyberswap API, along with the raw input amount it was quoted for"""
         try:
-            url = f"{self.aggregator_api}/routes"
-            if token_in.lower() == self.NATIVE_TOKEN.lower():
-                amount_raw = self._web3.to_wei(amount, 'ether')
+            url = self._swap_route_url
+            if token_in.lower() == self._native_token_lower:
+                amount_raw = self.web3.to_wei(amount, 'ether')
             else:
-                token_contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_in),
-                    abi=ERC20_ABI
-                )
-                decimals = token_contract.functions.decimals().call()
+                decimals = self._token_decimals(token_in)
                 amount_raw = int(amount * (10 ** decimals))
             
-            headers = {"x-client-id": "zerepy"}
             params = {
                 "tokenIn": token_in,
                 "tokenOut": token_out,
@@ -367,24 +728,27 @@ class EVMConnection(BaseConnection):
                 "to": sender,
                 "gasInclude": "true"
             }
-            response = requests.get(url, headers=headers, params=params)
+            response = self._http.get(url, headers=KYBERSWAP_HEADERS, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             if data.get("code") != 0:
                 raise ValueError(f"API error: {data.get('message')}")
-            return data["data"]
+            return data["data"], amount_raw
                 
         except Exception as e:
             logger.error(f"Failed to get swap route: {str(e)}")
             raise
 
-    def _build_swap_tx(self, token_in: str, token_out: str, amount: float, slippage: float, route_data: Dict) -> Dict[str, Any]:
-        """Build swap transaction using route data"""
+    def _build_swap_tx(self, token_in: str, token_out: str, amount: float, slippage: float, route_data: Dict,
+                       nonce: Optional[int] = None, approval: Optional[Future] = None) -> Dict[str, Any]:
+        """
+        Build swap transaction using route data.
+        When an approval is still mining, pass its nonce + 1 and its pending receipt future;
+        gas is only estimated once the approval has confirmed.
+        """
         try:
-            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
-            account = self._web3.eth.account.from_key(private_key)
-            url = f"{self.aggregator_api}/route/build"
-            headers = {"x-client-id": "zerepy"}
+            account = self._get_account()
+            url = self._swap_build_url
             payload = {
                 "routeSummary": route_data["routeSummary"],
                 "sender": account.address,
@@ -393,22 +757,29 @@ class EVMConnection(BaseConnection):
                 "deadline": int(time.time() + 1200),
                 "source": "zerepy"
             }
-            response = requests.post(url, headers=headers, json=payload)
+            # Nonce and gas price don't depend on the built route, fetch them while Kyberswap responds
+            fee_future = self._executor.submit(self._get_nonce_and_fees, account.address)
+            response = self._http.post(url, headers=KYBERSWAP_HEADERS, json=payload, timeout=10)
             response.raise_for_status()
             data = response.json()
             if data.get("code") != 0:
                 raise ValueError(f"API error: {data.get('message')}")
+            fetched_nonce, fees = fee_future.result()
+            if nonce is None:
+                nonce = fetched_nonce
             tx = {
                 'from': account.address,
-                'to': Web3.to_checksum_address(route_data["routerAddress"]),
+                'to': _checksum(route_data["routerAddress"]),
                 'data': data["data"]["data"],
-                'value': self._web3.to_wei(amount, 'ether') if token_in.lower() == self.NATIVE_TOKEN.lower() else 0,
-                'nonce': self._web3.eth.get_transaction_count(account.address),
-                'gasPrice': self._web3.eth.gas_price,
+                'value': self.web3.to_wei(amount, 'ether') if token_in.lower() == self._native_token_lower else 0,
+                'nonce': nonce,
+                **fees,
                 'chainId': self.chain_id
             }
+            if approval is not None:
+                approval.result()
             try:
-                gas_estimate = self._web3.eth.estimate_gas(tx)
+                gas_estimate = self.web3.eth.estimate_gas(tx)
                 tx['gas'] = int(gas_estimate * 1.2)
             except Exception as e:
                 logger.warning(f"Gas estimation failed: {e}, using default gas limit")
@@ -419,72 +790,104 @@ class EVMConnection(BaseConnection):
             logger.error(f"Failed to build swap transaction: {str(e)}")
             raise
 
-    def _handle_token_approval(self, token_address: str, spender_address: str, amount: int) -> Optional[str]:
-        """Handle token approval for spender"""
+    def _handle_token_approval(self, token_address: str, spender_address: str, amount: int) -> Optional[Tuple[str, int]]:
+        """
+        Broadcast a token approval for spender if the allowance is too low.
+        Returns the approval tx hash and nonce without waiting for it to be mined.
+        """
         try:
-            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
-            account = self._web3.eth.account.from_key(private_key)
-            token_contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address),
-                abi=ERC20_ABI
-            )
-            current_allowance = token_contract.functions.allowance(account.address, spender_address).call()
+            account = self._get_account()
+            token_contract = self._erc20(token_address)
+            spender_address = _checksum(spender_address)
+            # Allowance, nonce and fees share one batched request
+            allowance_call = {
+                "to": token_contract.address,
+                "data": token_contract.encodeABI(fn_name="allowance", args=[account.address, spender_address])
+            }
+            nonce, fees, allowance_hex = self._get_nonce_and_fees(
+                account.address, ("eth_call", [allowance_call, "latest"]))
+            current_allowance = decode(["uint256"], bytes.fromhex(allowance_hex[2:]))[0]
             if current_allowance < amount:
                 approve_tx = token_contract.functions.approve(
                     spender_address,
                     amount
                 ).build_transaction({
                     'from': account.address,
-                    'nonce': self._web3.eth.get_transaction_count(account.address),
-                    'gasPrice': self._web3.eth.gas_price,
+                    'nonce': nonce,
+                    **fees,
                     'chainId': self.chain_id
                 })
                 try:
-                    gas_estimate = self._web3.eth.estimate_gas(approve_tx)
+                    gas_estimate = self.web3.eth.estimate_gas(approve_tx)
                     approve_tx['gas'] = int(gas_estimate * 1.1)
                 except Exception as e:
                     logger.warning(f"Approval gas estimation failed: {e}, using default")
                     approve_tx['gas'] = 100000
                 signed_approve = account.sign_transaction(approve_tx)
-                tx_hash = self._web3.eth.send_raw_transaction(signed_approve.rawTransaction)
-                receipt = self._web3.eth.wait_for_transaction_receipt(tx_hash)
-                if receipt['status'] != 1:
-                    raise ValueError("Token approval failed")
-                return tx_hash.hex()
+                tx_hash = self.web3.eth.send_raw_transaction(signed_approve.rawTransaction)
+                return tx_hash.hex(), nonce
             return None
 
         except Exception as e:
             logger.error(f"Token approval failed: {str(e)}")
             raise
 
+    async def _wait_for_receipt_ws(self, tx_hash: str):
+        """Wait for a receipt by checking once per new block head over a websocket subscription"""
+        async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self.ws_url)) as w3:
+            await w3.eth.subscribe("newHeads")
+            # The tx may have been mined before the subscription started
+            while True:
+                try:
+                    return await w3.eth.get_transaction_receipt(tx_hash)
+                except TransactionNotFound:
+                    pass
+                async for _ in w3.ws.process_subscriptions():
+                    break
+
+    def _wait_for_approval(self, tx_hash: str) -> None:
+        """Block until an approval is mined, raising if it reverted"""
+        receipt = None
+        if self.ws_url:
+            try:
+                receipt = self._run_async(asyncio.wait_for(self._wait_for_receipt_ws(tx_hash), timeout=120))
+            except Exception as e:
+                logger.warning(f"Websocket receipt wait failed: {e}, falling back to polling")
+        if receipt is None:
+            # Poll a few times per block: web3's fixed 0.1s default spams slow chains
+            receipt = self.web3.eth.wait_for_transaction_receipt(
+                tx_hash, timeout=120, poll_latency=self.block_time / 4)
+        if receipt['status'] != 1:
+            raise ValueError("Token approval failed")
+
     def swap(self, token_in: str, token_out: str, amount: float, slippage: float = 0.5) -> str:
         """Execute token swap using Kyberswap aggregator"""
         try:
-            private_key = os.getenv("EVM_PRIVATE_KEY") or os.getenv("ETH_PRIVATE_KEY")
-            account = self._web3.eth.account.from_key(private_key)
-            current_balance = self.get_balance(
-                token_address=None if token_in.lower() == self.NATIVE_TOKEN.lower() else token_in
+            account = self._get_account()
+            # The balance check and the Kyberswap route lookup are independent, run them side by side
+            balance_future = self._executor.submit(
+                self.get_balance,
+                token_address=None if token_in.lower() == self._native_token_lower else token_in
             )
+            route_data, amount_raw = self._get_swap_route(token_in, token_out, amount, account.address)
+            current_balance = balance_future.result()
             if current_balance < amount:
                 raise ValueError(f"Insufficient balance. Required: {amount}, Available: {current_balance}")
-            route_data = self._get_swap_route(token_in, token_out, amount, account.address)
-            if token_in.lower() != self.NATIVE_TOKEN.lower():
+            swap_nonce = None
+            approval_wait = None
+            if token_in.lower() != self._native_token_lower:
                 router_address = route_data["routerAddress"]
-                if token_in.lower() == "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2".lower():
-                    amount_raw = self._web3.to_wei(amount, 'ether')
-                else:
-                    token_contract = self._web3.eth.contract(
-                        address=Web3.to_checksum_address(token_in),
-                        abi=ERC20_ABI
-                    )
-                    decimals = token_contract.functions.decimals().call()
-                    amount_raw = int(amount * (10 ** decimals))
-                approval_hash = self._handle_token_approval(token_in, router_address, amount_raw)
-                if approval_hash:
+                approval = self._handle_token_approval(token_in, router_address, amount_raw)
+                if approval:
+                    approval_hash, approval_nonce = approval
                     logger.info(f"Token approval transaction: {self._get_explorer_link(approval_hash)}")
-            swap_tx = self._build_swap_tx(token_in, token_out, amount, slippage, route_data)
+                    # Build the swap while the approval mines; it must follow the approval's nonce
+                    approval_wait = self._executor.submit(self._wait_for_approval, approval_hash)
+                    swap_nonce = approval_nonce + 1
+            swap_tx = self._build_swap_tx(
+                token_in, token_out, amount, slippage, route_data, nonce=swap_nonce, approval=approval_wait)
             signed_tx = account.sign_transaction(swap_tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
             tx_url = self._get_explorer_link(tx_hash.hex())
             return (f"Swap transaction sent! (allow time for scanner to populate it):\nTransaction: {tx_url}")
                 
@@ -495,9 +898,8 @@ class EVMConnection(BaseConnection):
         """Execute an Ethereum action with validation"""
         if action_name not in self.actions:
             raise KeyError(f"Unknown action: {action_name}")
-        load_dotenv()
         if not self.is_configured(verbose=True):
-            raise EthereumConnectionError("Ethereum connection is not properly configured")
+            raise EVMConnectionError("Ethereum connection is not properly configured")
         action = self.actions[action_name]
         errors = action.validate_params(kwargs)
         if errors:
@@ -1,6 +1,6 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from dotenv import load_dotenv, set_key
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
@@ -64,9 +64,27 @@ class OpenAIConnection(BaseConnection):
                                     "Response format to use"),
                     ActionParameter("model", False, str,
                                     "Model to use for generation"),
+                    ActionParameter("prompt_cache_key", False, str,
+                                    "Key used by the provider to reuse the cached system prompt prefix"),
                 ],
                 description="Generate text using OpenAI models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str,
+                                    "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str,
+                                    "System prompt to guide the model"),
+                    ActionParameter(
+                        "stop", False, list[str], "Stop sequences"),
+                    ActionParameter("model", False, str,
+                                    "Model to use for generation"),
+                    ActionParameter("prompt_cache_key", False, str,
+                                    "Key used by the provider to reuse the cached system prompt prefix"),
+                ],
+                description="Generate text using OpenAI models, yielding chunks as they arrive"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -153,6 +171,7 @@ class OpenAIConnection(BaseConnection):
             model: str = None,
             stop: list[str] = None,
             response_format: Any = None,
+            prompt_cache_key: str = None,
             **kwargs
     ) -> str:
         """Generate text using OpenAI models"""
@@ -162,6 +181,7 @@ class OpenAIConnection(BaseConnection):
             # Use configured model if none provided
             if not model:
                 model = self.config["model"]
+            extra_body = {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
             # logger.info(f"start requesting model: {model} with prompt {prompt} and system_prompt {system_prompt} and with stop {stop}")
             if response_format:
                 logger.info(
@@ -174,6 +194,7 @@ class OpenAIConnection(BaseConnection):
                         {"role": "user", "content": prompt},
                     ],
                     response_format=response_format,
+                    extra_body=extra_body,
                 )
                 return completion.choices[0].message.content
             completion = client.chat.completions.create(
@@ -182,7 +203,8 @@ class OpenAIConnection(BaseConnection):
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt},
                 ],
-                stop=stop
+                stop=stop,
+                extra_body=extra_body,
             )
 
             return completion.choices[0].message.content
@@ -190,6 +212,44 @@ class OpenAIConnection(BaseConnection):
         except Exception as e:
             raise OpenAIAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(
+            self,
+            prompt: str,
+            system_prompt: str,
+            stop: list[str] = None,
+            model: str = None,
+            prompt_cache_key: str = None,
+            **kwargs
+    ) -> Iterator[str]:
+        """Stream text from OpenAI models. Closing the generator closes the underlying HTTP stream"""
+        try:
+            client = self._get_client()
+
+            if not model:
+                model = self.config["model"]
+            extra_body = {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
+            stream = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                stop=stop,
+                stream=True,
+                extra_body=extra_body,
+            )
+        except Exception as e:
+            raise OpenAIAPIError(f"Text generation failed: {e}")
+
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise OpenAIAPIError(f"Text generation failed: {e}")
+        finally:
+            stream.close()
+
     def check_model(self, model, **kwargs):
         try:
             client = self._get_client()
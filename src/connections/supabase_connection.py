@@ -1,13 +1,19 @@
 import logging
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Tuple
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.helpers.env_file import update_env_file
 import os
-from dotenv import load_dotenv, set_key
+from dotenv import load_dotenv
 from supabase import create_client, Client
 
 
 logger = logging.getLogger("connections.supabase_connection")
 
+# Clients are shared process-wide per (url, key) so every connection reuses one HTTP pool
+_clients: Dict[Tuple[str, str], Client] = {}
+_clients_lock = threading.Lock()
+
 
 class SupabaseConnectionError(Exception):
     """Base exception for Supabase connection errors"""
@@ -27,6 +33,8 @@ class SupabaseAPIError(SupabaseConnectionError):
 class SupabaseConnection(BaseConnection):
     def __init__(self, config: Dict[str, Any]):
         logger.info("Initializing Supabase connection...")
+        # .env is read once here; call refresh_env() to pick up later edits
+        load_dotenv()
         super().__init__(config)
         self._client = None
 
@@ -83,14 +91,10 @@ class SupabaseConnection(BaseConnection):
         }
 
         try:
-            if not os.path.exists('.env'):
-                with open('.env', 'w') as f:
-                    f.write('')
-
-            for key, value in credentials.items():
-                set_key('.env', key, value)
-                logger.debug(f"Saved {key} to .env")
+            update_env_file(credentials)
+            logger.debug(f"Saved {', '.join(credentials)} to .env")
 
+            self.refresh_env()
             logger.info("\n✅ Supbase configuration successfully saved!")
             logger.info("Your credentials has been stored in the .env file.")
             return True
@@ -148,6 +152,14 @@ class SupabaseConnection(BaseConnection):
                                     "User id to check if subscribed"),
                 ],
                 description="Returns True if user is subscribed"
+            ),
+            "check-subscribed-users": Action(
+                name="check-subscribed-users",
+                parameters=[
+                    ActionParameter("user_ids", True, list,
+                                    "User ids to check if subscribed"),
+                ],
+                description="Returns the subset of the given user ids that are subscribed"
             )
         }
 
@@ -169,7 +181,6 @@ class SupabaseConnection(BaseConnection):
     def _get_credentials(self) -> Dict[str, str]:
         """Get Supabase credentials from environment with validation"""
         logger.debug("Retrieving Twitter credentials")
-        load_dotenv()
 
         required_vars = {
             'SUPABASE_URL': 'client url',
@@ -192,6 +203,11 @@ class SupabaseConnection(BaseConnection):
         logger.debug("All required credentials found")
         return credentials
 
+    def refresh_env(self) -> None:
+        """Re-read .env and drop the client built from the previous credentials"""
+        load_dotenv(override=True)
+        self._client = None
+
     def _get_client(self) -> Client:
         """Get or create Supabase client"""
         if not self._client:
@@ -200,20 +216,22 @@ class SupabaseConnection(BaseConnection):
             if not url and not key:
                 raise SupabaseConfigurationError(
                     "Supabase url and/or key not found in environment")
-            self._client = create_client(url, key)
+            with _clients_lock:
+                client = _clients.get((url, key))
+                if client is None:
+                    client = _clients[(url, key)] = create_client(url, key)
+            self._client = client
         return self._client
 
     def get_tokens(self, chain: str, **kwargs) -> List:
         """Generate top 10 tokens"""
         try:
             client = self._get_client()
-            response = client.table("chains").select(
-                "id").eq("name", chain).execute()
-            logger.info(response.data)
-            chain_id = response.data[0]['id']
-
+            # Inner join on chains filters by chain name in the same request
             response = client.table('tokens').select(
-                '*').eq('chain_id', chain_id).order("price", desc=True).limit(10).execute()
+                '*, chains!inner(name)').eq('chains.name', chain).order("price", desc=True).limit(10).execute()
+            for token in response.data:
+                token.pop('chains', None)
             return response.data
         except Exception as e:
             raise SupabaseAPIError(f"Query failed: {e}")
@@ -227,8 +245,26 @@ class SupabaseConnection(BaseConnection):
                 .select('account_id') \
                 .eq('account_id', user_id) \
                 .eq('is_active', True) \
+                .limit(1) \
                 .execute()
 
             return len(response.data) > 0
         except Exception as e:
             raise SupabaseAPIError(f"Query failed: {e}")
+
+    def check_subscribed_users(self, user_ids: List[str]) -> List[str]:
+        """Get subscribed users among the given ids in a single query"""
+        if not user_ids:
+            return []
+        try:
+            client = self._get_client()
+
+            response = client.table('x_users') \
+                .select('account_id') \
+                .in_('account_id', list(set(user_ids))) \
+                .eq('is_active', True) \
+                .execute()
+
+            return [row['account_id'] for row in response.data]
+        except Exception as e:
+            raise SupabaseAPIError(f"Query failed: {e}")
@@ -17,16 +17,43 @@ EVM_NETWORKS = {
     "ethereum": {
         "rpc_url": "https://ethereum-rpc.publicnode.com",
         "scanner_url": "etherscan.io",
-        "chain_id": 1
+        "chain_id": 1,
+        "block_time": 12
     },
     "base": {
         "rpc_url": "https://mainnet.base.org",
         "scanner_url": "basescan.org",
-        "chain_id": 8453
+        "chain_id": 8453,
+        "block_time": 2
     },
     "polygon": {
         "rpc_url": "https://polygon-rpc.com",
         "scanner_url": "polygonscan.com",
-        "chain_id": 137
+        "chain_id": 137,
+        "block_time": 2
     }
-}
\ No newline at end of file
+}
+# Fixed decimals of widely used tokens (chain_id -> lowercase address -> decimals),
+# so balance and amount conversions for them never need a decimals() call
+DECIMALS_OVERRIDES = {
+    1: {
+        "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48": 6,   # USDC
+        "0xdac17f958d2ee523a2206206994597c13d831ec7": 6,   # USDT
+        "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2": 18,  # WETH
+        "0x6b175474e89094c44da98b954eedeac495271d0f": 18,  # DAI
+        "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599": 8    # WBTC
+    },
+    8453: {
+        "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": 6,   # USDC
+        "0x4200000000000000000000000000000000000006": 18,  # WETH
+        "0x50c5725949a6f0c72e6c4a641f24049a917db0cb": 18   # DAI
+    },
+    137: {
+        "0x3c499c542cef5e3811e1192ce70d8cc03d5c3359": 6,   # USDC
+        "0x2791bca1f2de4661ed88a30c99a7a9449aa84174": 6,   # USDC.e
+        "0xc2132d05d31c914a87c6611c10748aeb04b58e8f": 6,   # USDT
+        "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619": 18,  # WETH
+        "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270": 18,  # WMATIC
+        "0x8f3cf7ad23cd3cadbd9735aff958023239c6a063": 18   # DAI
+    }
+}
@@ -0,0 +1,43 @@
+"""
+Write several .env entries in a single pass, instead of one read/rewrite per key with dotenv.set_key.
+"""
+import os
+import re
+import tempfile
+from typing import Dict
+
+_KEY_PATTERN = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=")
+
+
+def _format_entry(key: str, value: str) -> str:
+    # Same quoting as dotenv.set_key's default quote_mode="always"
+    escaped = value.replace("'", "\\'")
+    return f"{key}='{escaped}'\n"
+
+
+def update_env_file(values: Dict[str, str], path: str = ".env") -> None:
+    """Set the given keys in path, keeping every other line, and replace the file atomically"""
+    lines = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        match = _KEY_PATTERN.match(line)
+        if match and match.group(1) in pending:
+            key = match.group(1)
+            lines[i] = _format_entry(key, pending.pop(key))
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    lines.extend(_format_entry(key, value) for key, value in pending.items())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".env.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
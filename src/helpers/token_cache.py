@@ -0,0 +1,96 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("helpers.token_cache")
+
+DEFAULT_CACHE_PATH = Path.home() / ".zerepy" / "token_cache.sqlite"
+DEFAULT_TTL = 86400
+
+
+class TokenCache:
+    """On-disk cache of ticker -> token address lookups and token decimals, scoped by network"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl: int = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = None
+        # The database is opened on first use, leaving _db None if that fails
+        self._opened = False
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use, disabling persistence if the cache directory is unusable"""
+        if self._opened:
+            return self._db
+        self._opened = True
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS token_cache ("
+                "network TEXT, ticker TEXT, address TEXT NOT NULL, ts INTEGER NOT NULL, "
+                "PRIMARY KEY (network, ticker))"
+            )
+            # decimals() is immutable, so these rows never expire
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS token_decimals ("
+                "network TEXT, address TEXT, decimals INTEGER NOT NULL, "
+                "PRIMARY KEY (network, address))"
+            )
+            db.commit()
+            self._db = db
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Token cache persistence disabled: {e}")
+        return self._db
+
+    def get(self, network: str, ticker: str) -> Optional[str]:
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT address, ts FROM token_cache WHERE network = ? AND ticker = ?",
+                (network, ticker.lower())).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+        return row[0]
+
+    def set(self, network: str, ticker: str, address: str) -> None:
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO token_cache (network, ticker, address, ts) VALUES (?, ?, ?, ?)",
+                    (network, ticker.lower(), address, int(time.time())))
+                db.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"Could not persist token address: {e}")
+
+    def get_decimals(self, network: str, address: str) -> Optional[int]:
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT decimals FROM token_decimals WHERE network = ? AND address = ?",
+                (network, address.lower())).fetchone()
+        return row[0] if row else None
+
+    def set_decimals(self, network: str, address: str, decimals: int) -> None:
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO token_decimals (network, address, decimals) VALUES (?, ?, ?)",
+                    (network, address.lower(), decimals))
+                db.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"Could not persist token decimals: {e}")
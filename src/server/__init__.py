@@ -1,7 +1,18 @@
+import logging
+from importlib.util import find_spec
+
 import uvicorn
 from .app import create_app
 
+logger = logging.getLogger("server")
+
+
 def start_server(host: str = "0.0.0.0", port: int = 8000):
     """Start the ZerePy server"""
     app = create_app()
-    uvicorn.run(app, host=host, port=port)
\ No newline at end of file
+    # uvloop and httptools are optional speedups; fall back to the pure-Python loop and parser
+    loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    logger.info(f"Serving with loop={loop} http={http}")
+    # Single process: the loaded agent and its loop live in this process's ServerState
+    uvicorn.run(app, host=host, port=port, loop=loop, http=http)
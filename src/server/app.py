@@ -1,20 +1,38 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import functools
 import logging
-import threading
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
 import time
-from pathlib import Path
-from typing import Dict, List, Literal, Optional, Union, Any
-from uuid import uuid4
+from typing import Dict, Final, List, Literal, Optional, Union, Any
 
+import anyio
 import shortuuid
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 
 from src.cli import ZerePyCLI
+from src.helpers import fast_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("server/app")
 
+# Seconds the agent loop sleeps between iterations when the agent config sets no loop_delay
+AGENT_LOOP_INTERVAL = 1.0
+# Seconds between SSE comments sent while a streamed completion is still being worked on
+STREAM_KEEPALIVE_INTERVAL = 15.0
+# ORJSONResponse needs orjson at render time, so only use it when the optional dependency is installed
+FastJSONResponse = ORJSONResponse if fast_json.orjson is not None else JSONResponse
+# Worker threads anyio may use for sync dependencies and run_in_threadpool (its default is 40)
+THREAD_LIMIT = 200
+# Worker threads for asyncio.to_thread (LLM prompts) and, separately, for agent actions
+LLM_WORKERS = 64
+ACTION_WORKERS = 32
+
 
 class Token(BaseModel):
     name: str = Field(..., description="Name token")
@@ -22,7 +40,9 @@ class Token(BaseModel):
     description: str = Field(..., description="Description token")
 
 
-response_format = {
+# Built once and passed by reference to every structured output call. It stays a plain dict
+# (not a MappingProxyType) because the OpenAI SDK serializes it as-is; treat it as read-only.
+RESPONSE_FORMAT: Final[Dict[str, Any]] = {
     "type": "json_schema",
     "json_schema": {
         "name": "token_response",
@@ -92,6 +112,15 @@ class ChatCompletionRequest(BaseModel):
     user: Optional[str] = None
 
 
+class ChatCompletionRequestLite(BaseModel):
+    """The ChatCompletionRequest fields the completion endpoints read; everything else is ignored"""
+    model_config = ConfigDict(extra="ignore")
+
+    model: str
+    messages: Union[str, List[Dict[str, Any]]]
+    stream: Optional[bool] = False
+
+
 class ChatMessage(BaseModel):
     role: str
     content: str
@@ -112,6 +141,77 @@ class ChatCompletionResponse(BaseModel):
     usage: UsageInfo
 
 
+def _completion_id() -> str:
+    return f"chatcmpl-{shortuuid.random()}"
+
+
+# Parts of a chat.completion body that are the same for every response; only read, never mutated
+_COMPLETION_TEMPLATE = {
+    "object": "chat.completion",
+    "usage": {
+        "prompt_tokens": 9,
+        "completion_tokens": 12,
+        "total_tokens": 21,
+        "completion_tokens_details": {
+            "reasoning_tokens": 0,
+            "accepted_prediction_tokens": 0,
+            "rejected_prediction_tokens": 0
+        }
+    }
+}
+
+
+def _completion(completion_id: str, model: str, content: str) -> Dict[str, Any]:
+    """OpenAI-style chat.completion body for a finished answer"""
+    body = _COMPLETION_TEMPLATE.copy()
+    body["id"] = completion_id
+    body["model"] = model
+    body["created"] = int(time.time())
+    body["choices"] = [{
+        "index": 0,
+        "message": {"role": "assistant", "content": content},
+        "logprobs": None,
+        "finish_reason": "stop"
+    }]
+    return body
+
+
+def _completion_chunk(completion_id: str, model: str, created: int, delta: Dict[str, str],
+                      finish_reason: Optional[str] = None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {fast_json.dumps(chunk)}\n\n"
+
+
+async def _stream_agent_completion(agent, messages, completion_id: str, model: str):
+    """Stream prompt_agent's answer as OpenAI-style chat.completion.chunk server-sent events.
+
+    The role chunk goes out before the agent starts, and SSE comments keep the connection
+    alive while the ReAct steps run on a worker thread.
+    """
+    created = int(time.time())
+    answer = asyncio.get_running_loop().run_in_executor(None, agent.prompt_agent, messages)
+    yield _completion_chunk(completion_id, model, created, {"role": "assistant"})
+    while not answer.done():
+        done, _ = await asyncio.wait([answer], timeout=STREAM_KEEPALIVE_INTERVAL)
+        if not done:
+            yield ": keep-alive\n\n"
+    try:
+        content = answer.result()
+    except Exception as e:
+        logger.error(f"Error streaming completion: {e}")
+        yield f"data: {fast_json.dumps({'error': {'message': str(e)}})}\n\n"
+        return
+    yield _completion_chunk(completion_id, model, created, {"content": content or ""})
+    yield _completion_chunk(completion_id, model, created, {}, "stop")
+    yield "data: [DONE]\n\n"
+
+
 class ServerState:
     """Simple state management for the server"""
 
@@ -119,58 +219,184 @@ class ServerState:
         self.cli = ZerePyCLI()
         self.agent_running = False
         self.agent_task = None
-        self._stop_event = threading.Event()
+        self._stop_event = asyncio.Event()
+        # Serializes start/stop; stop awaits the task, and a start landing meanwhile would clear the stop event
+        self._start_lock = asyncio.Lock()
+        # (agents dir mtime_ns, agent names); adding, removing or renaming a file bumps the mtime
+        self._agents_cache: Optional[tuple[int, List[str]]] = None
+        self._agents_lock = asyncio.Lock()
+        # name -> id(connection) for connections that reported configured; cleared whenever an agent is
+        # loaded or a connection configured. Negative results are never cached, since is_configured() can
+        # fail on a transient RPC error and must be retried on the next request
+        self._configured: Dict[str, int] = {}
+
+    def invalidate_connections(self):
+        self._configured.clear()
+
+    def connection_configured(self, name: str, connection, verbose: bool = False) -> bool:
+        if self._configured.get(name) == id(connection):
+            return True
+        configured = connection.is_configured(verbose=verbose)
+        if configured:
+            self._configured[name] = id(connection)
+        return configured
+
+    async def list_agents(self) -> List[str]:
+        """Agent names in the agents directory, rescanned only when the directory changes"""
+        try:
+            mtime = os.stat("agents").st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._agents_cache and self._agents_cache[0] == mtime:
+            return self._agents_cache[1]
+        async with self._agents_lock:
+            if self._agents_cache and self._agents_cache[0] == mtime:
+                return self._agents_cache[1]
+            with os.scandir("agents") as entries:
+                agents = [
+                    entry.name[:-5] for entry in entries
+                    if entry.name.endswith(".json") and entry.name != "general.json"
+                    and entry.is_file(follow_symlinks=False)
+                ]
+            self._agents_cache = (mtime, agents)
+            return agents
+
+    async def _wait_for_stop(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds, returning True early if a stop was requested"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
 
-    def _run_agent_loop(self):
-        """Run agent loop in a separate thread"""
+    async def _run_agent_loop(self):
+        """Run agent loop as a task on the server's event loop"""
         try:
             log_once = False
-            while not self._stop_event.is_set():
-                if self.cli.agent:
-                    try:
-                        if not log_once:
-                            logger.info("Loop logic not implemented")
-                            log_once = True
-
-                    except Exception as e:
-                        logger.error(f"Error in agent action: {e}")
-                        if self._stop_event.wait(timeout=30):
-                            break
+            interval = AGENT_LOOP_INTERVAL
+            # The stop event is both the loop clock and the cancellation check
+            while not await self._wait_for_stop(interval):
+                agent = self.cli.agent
+                if not agent:
+                    interval = AGENT_LOOP_INTERVAL
+                    continue
+                interval = getattr(agent, "loop_delay", None) or AGENT_LOOP_INTERVAL
+                try:
+                    if not log_once:
+                        logger.info("Loop logic not implemented")
+                        log_once = True
+
+                except Exception as e:
+                    logger.error(f"Error in agent action: {e}")
+                    interval = 30
         except Exception as e:
-            logger.error(f"Error in agent loop thread: {e}")
+            logger.error(f"Error in agent loop task: {e}")
         finally:
             self.agent_running = False
             logger.info("Agent loop stopped")
 
     async def start_agent_loop(self):
-        """Start the agent loop in background thread"""
-        if not self.cli.agent:
-            raise ValueError("No agent loaded")
+        """Start the agent loop as a background task"""
+        async with self._start_lock:
+            if not self.cli.agent:
+                raise ValueError("No agent loaded")
 
-        if self.agent_running:
-            raise ValueError("Agent already running")
+            if self.agent_running:
+                raise ValueError("Agent already running")
 
-        self.agent_running = True
-        self._stop_event.clear()
-        self.agent_task = threading.Thread(target=self._run_agent_loop)
-        self.agent_task.start()
+            self.agent_running = True
+            self._stop_event.clear()
+            self.agent_task = asyncio.create_task(self._run_agent_loop())
 
     async def stop_agent_loop(self):
         """Stop the agent loop"""
-        if self.agent_running:
-            self._stop_event.set()
-            if self.agent_task:
-                self.agent_task.join(timeout=5)
-            self.agent_running = False
+        async with self._start_lock:
+            if self.agent_running:
+                self._stop_event.set()
+                if self.agent_task:
+                    done, _ = await asyncio.wait([self.agent_task], timeout=5)
+                    if not done:
+                        # Don't leave a straggler running alongside the next start
+                        self.agent_task.cancel()
+                        await asyncio.gather(self.agent_task, return_exceptions=True)
+                self.agent_running = False
+
+    async def shutdown(self):
+        """Cancel the agent loop task so it does not outlive the server's event loop"""
+        self._stop_event.set()
+        if self.agent_task and not self.agent_task.done():
+            self.agent_task.cancel()
+            await asyncio.gather(self.agent_task, return_exceptions=True)
+        self.agent_task = None
+        self.agent_running = False
 
 
 class ZerePyServer:
     def __init__(self):
-        self.app = FastAPI(title="ZerePy Server")
+        self.app = FastAPI(
+            title="ZerePy Server", lifespan=self.lifespan, default_response_class=FastJSONResponse)
         self.state = ServerState()
+        self._action_executor: Optional[ThreadPoolExecutor] = None
         self.setup_routes()
 
+    @staticmethod
+    def _start_log_listener() -> tuple[QueueListener, List[logging.Handler]]:
+        """Route root log records through a queue so one listener thread does all the writing"""
+        root = logging.getLogger()
+        handlers = list(root.handlers)
+        listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        for handler in handlers:
+            root.removeHandler(handler)
+        root.addHandler(QueueHandler(listener.queue))
+        listener.start()
+        return listener, handlers
+
+    @staticmethod
+    def _stop_log_listener(listener: QueueListener, handlers: List[logging.Handler]):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+                root.removeHandler(handler)
+        # Flushes whatever is still queued before the original handlers are put back
+        listener.stop()
+        for handler in handlers:
+            root.addHandler(handler)
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_LIMIT
+        log_listener, log_handlers = self._start_log_listener()
+        # The stock default executor is capped at min(32, cpu + 4) threads, too few for concurrent LLM calls
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm"))
+        # Actions get their own pool so slow on-chain or API calls don't queue behind prompts
+        self._action_executor = ThreadPoolExecutor(max_workers=ACTION_WORKERS, thread_name_prefix="agent-actions")
+        try:
+            yield
+        finally:
+            await self.state.shutdown()
+            self._action_executor.shutdown(wait=False, cancel_futures=True)
+            self._action_executor = None
+            self._stop_log_listener(log_listener, log_handlers)
+
     def setup_routes(self):
+        # async so FastAPI resolves them on the event loop instead of dispatching to the threadpool
+        async def require_agent():
+            agent = self.state.cli.agent
+            if not agent:
+                raise HTTPException(status_code=400, detail="No agent loaded")
+            return agent
+
+        async def require_connection(name: str):
+            # Looks the agent up itself rather than depending on require_agent, saving a dependency resolution
+            agent = self.state.cli.agent
+            if not agent:
+                raise HTTPException(status_code=400, detail="No agent loaded")
+            connection = agent.connection_manager.connections.get(name)
+            if not connection:
+                raise HTTPException(status_code=404, detail=f"Connection {name} not found")
+            return connection
+
         @self.app.get("/")
         async def root():
             """Server status endpoint"""
@@ -184,13 +410,7 @@ class ZerePyServer:
         async def list_agents():
             """List available agents"""
             try:
-                agents = []
-                agents_dir = Path("agents")
-                if agents_dir.exists():
-                    for agent_file in agents_dir.glob("*.json"):
-                        if agent_file.stem != "general":
-                            agents.append(agent_file.stem)
-                return {"agents": agents}
+                return {"agents": await self.state.list_agents()}
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
@@ -199,6 +419,7 @@ class ZerePyServer:
             """Load a specific agent"""
             try:
                 self.state.cli._load_agent_from_file(name)
+                self.state.invalidate_connections()
                 return {
                     "status": "success",
                     "agent": name
@@ -207,16 +428,13 @@ class ZerePyServer:
                 raise HTTPException(status_code=400, detail=str(e))
 
         @self.app.get("/connections")
-        async def list_connections():
+        async def list_connections(agent=Depends(require_agent)):
             """List all available connections"""
-            if not self.state.cli.agent:
-                raise HTTPException(status_code=400, detail="No agent loaded")
-
             try:
                 connections = {}
-                for name, conn in self.state.cli.agent.connection_manager.connections.items():
+                for name, conn in agent.connection_manager.connections.items():
                     connections[name] = {
-                        "configured": conn.is_configured(),
+                        "configured": self.state.connection_configured(name, conn),
                         "is_llm_provider": conn.is_llm_provider
                     }
                 return {"connections": connections}
@@ -224,28 +442,25 @@ class ZerePyServer:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.post("/agent/action")
-        async def agent_action(action_request: ActionRequest):
+        async def agent_action(action_request: ActionRequest, agent=Depends(require_agent)):
             """Execute a single agent action"""
-            if not self.state.cli.agent:
-                raise HTTPException(status_code=400, detail="No agent loaded")
-
             try:
-                result = await asyncio.to_thread(
-                    self.state.cli.agent.perform_action,
-                    connection=action_request.connection,
-                    action=action_request.action,
-                    params=action_request.params
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._action_executor,
+                    functools.partial(
+                        agent.perform_action,
+                        connection=action_request.connection,
+                        action=action_request.action,
+                        params=action_request.params
+                    )
                 )
                 return {"status": "success", "result": result}
             except Exception as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
         @self.app.post("/agent/start")
-        async def start_agent():
+        async def start_agent(agent=Depends(require_agent)):
             """Start the agent loop"""
-            if not self.state.cli.agent:
-                raise HTTPException(status_code=400, detail="No agent loaded")
-
             try:
                 await self.state.start_agent_loop()
                 return {"status": "success", "message": "Agent loop started"}
@@ -262,19 +477,12 @@ class ZerePyServer:
                 raise HTTPException(status_code=400, detail=str(e))
 
         @self.app.post("/connections/{name}/configure")
-        async def configure_connection(name: str, config: ConfigureRequest):
+        async def configure_connection(name: str, config: ConfigureRequest,
+                                       connection=Depends(require_connection)):
             """Configure a specific connection"""
-            if not self.state.cli.agent:
-                raise HTTPException(status_code=400, detail="No agent loaded")
-
             try:
-                connection = self.state.cli.agent.connection_manager.connections.get(
-                    name)
-                if not connection:
-                    raise HTTPException(
-                        status_code=404, detail=f"Connection {name} not found")
-
                 success = connection.configure(**config.params)
+                self.state.invalidate_connections()
                 if success:
                     return {"status": "success", "message": f"Connection {name} configured successfully"}
                 else:
@@ -285,21 +493,12 @@ class ZerePyServer:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.get("/connections/{name}/status")
-        async def connection_status(name: str):
+        async def connection_status(name: str, connection=Depends(require_connection)):
             """Get configuration status of a connection"""
-            if not self.state.cli.agent:
-                raise HTTPException(status_code=400, detail="No agent loaded")
-
             try:
-                connection = self.state.cli.agent.connection_manager.connections.get(
-                    name)
-                if not connection:
-                    raise HTTPException(
-                        status_code=404, detail=f"Connection {name} not found")
-
                 return {
                     "name": name,
-                    "configured": connection.is_configured(verbose=True),
+                    "configured": self.state.connection_configured(name, connection, verbose=True),
                     "is_llm_provider": connection.is_llm_provider
                 }
 
@@ -307,65 +506,25 @@ class ZerePyServer:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.post("/chat/completions")
-        async def create_chat_completion(request: ChatCompletionRequest):
-            response = self.state.cli.agent.prompt_agent(request.messages)
-            return {
-                "id": f"chatcmpl-{uuid4()}",
-                "object": "chat.completion",
-                "model": request.model,
-                "created": 1677652288,
-                "system_fingerprint": "fp_44709d6fcb",
-                "choices": [{
-                    "index": 0,
-                    "message": {
-                        "role": "assistant",
-                        "content": response,
-                    },
-                    "logprobs": None,
-                    "finish_reason": "stop"
-                }],
-                "usage": {
-                    "prompt_tokens": 9,
-                    "completion_tokens": 12,
-                    "total_tokens": 21,
-                    "completion_tokens_details": {
-                        "reasoning_tokens": 0,
-                        "accepted_prediction_tokens": 0,
-                        "rejected_prediction_tokens": 0
-                    }
-                }
-            }
+        async def create_chat_completion(request: ChatCompletionRequestLite, agent=Depends(require_agent)):
+            if request.stream:
+                return StreamingResponse(
+                    _stream_agent_completion(agent, request.messages, _completion_id(), request.model),
+                    media_type="text/event-stream"
+                )
+            # prompt_agent blocks on LLM round trips, keep it off the event loop
+            response = await asyncio.to_thread(agent.prompt_agent, request.messages)
+            return _completion(_completion_id(), request.model, response)
 
         @self.app.post("/structured_outputs/completions")
-        async def structured_outputs_completion(request: ChatCompletionRequest):
-            response = self.state.cli.agent.prompt_llm(prompt=request.messages, system_prompt="structured output",
-                                                       response_format=response_format)
-            return {
-                "id": f"chatcmpl-{uuid4()}",
-                "object": "chat.completion",
-                "model": request.model,
-                "created": 1677652288,
-                "system_fingerprint": "fp_44709d6fcb",
-                "choices": [{
-                    "index": 0,
-                    "message": {
-                        "role": "assistant",
-                        "content": response,
-                    },
-                    "logprobs": None,
-                    "finish_reason": "stop"
-                }],
-                "usage": {
-                    "prompt_tokens": 9,
-                    "completion_tokens": 12,
-                    "total_tokens": 21,
-                    "completion_tokens_details": {
-                        "reasoning_tokens": 0,
-                        "accepted_prediction_tokens": 0,
-                        "rejected_prediction_tokens": 0
-                    }
-                }
-            }
+        async def structured_outputs_completion(request: ChatCompletionRequestLite, agent=Depends(require_agent)):
+            response = await asyncio.to_thread(
+                agent.prompt_llm,
+                prompt=request.messages,
+                system_prompt="structured output",
+                response_format=RESPONSE_FORMAT
+            )
+            return _completion(_completion_id(), request.model, response)
 
 
 def create_app():